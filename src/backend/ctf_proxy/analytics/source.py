@@ -1,8 +1,11 @@
 import psycopg
+from psycopg.rows import tuple_row
 
 from ctf_proxy.analytics.context import ConnectionContext, RequestContext, TcpEvent
 from ctf_proxy.db.models import ProxyStatsDB
-from ctf_proxy.db.utils import parse_headers
+from ctf_proxy.db.utils import parse_headers_dict
+
+NO_RESPONSE = (None, None, None, None)
 
 
 class SourceReader:
@@ -19,8 +22,9 @@ class SourceReader:
         with self.connect() as conn:
             if not self.db.table_exists(conn, "http_request"):
                 return []
-            requests = self.db.http_requests.read_after(conn, last_id, limit)
-            return self.hydrate_http(conn, requests)
+            cursor = conn.cursor(row_factory=tuple_row)
+            requests = self.db.http_requests.read_after(cursor, last_id, limit)
+            return self.hydrate_http(cursor, requests)
 
     def read_http_backfill(
         self, last_id: int, target_id: int, ports: list[int] | None, limit: int
@@ -28,8 +32,9 @@ class SourceReader:
         with self.connect() as conn:
             if not self.db.table_exists(conn, "http_request"):
                 return []
-            requests = self.db.http_requests.read_range(conn, last_id, target_id, ports, limit)
-            return self.hydrate_http(conn, requests)
+            cursor = conn.cursor(row_factory=tuple_row)
+            requests = self.db.http_requests.read_range(cursor, last_id, target_id, ports, limit)
+            return self.hydrate_http(cursor, requests)
 
     def read_http_by_ids(self, ids: list[int]) -> list[RequestContext]:
         if not ids:
@@ -37,46 +42,50 @@ class SourceReader:
         with self.connect() as conn:
             if not self.db.table_exists(conn, "http_request"):
                 return []
-            requests = self.db.http_requests.read_by_ids(conn, ids)
-            return self.hydrate_http(conn, requests)
+            cursor = conn.cursor(row_factory=tuple_row)
+            requests = self.db.http_requests.read_by_ids(cursor, ids)
+            return self.hydrate_http(cursor, requests)
 
-    def hydrate_http(self, conn, requests) -> list[RequestContext]:
+    def hydrate_http(self, cursor, requests) -> list[RequestContext]:
         if not requests:
             return []
 
-        request_ids = [r["id"] for r in requests]
-
+        request_ids = [r[0] for r in requests]
         responses = {
-            row["request_id"]: row
-            for row in self.db.http_responses.get_by_request_ids(conn, request_ids)
-        }
-
-        request_headers = {r["id"]: dict(parse_headers(r["request_headers"])) for r in requests}
-        response_headers = {
-            resp["id"]: dict(parse_headers(resp["response_headers"]))
-            for resp in responses.values()
+            row[0]: row[1:] for row in self.db.http_responses.get_by_request_ids(cursor, request_ids)
         }
 
         contexts: list[RequestContext] = []
-        for r in requests:
-            response = responses.get(r["id"])
-            response_id = response["id"] if response else None
+        for (
+            request_id,
+            port,
+            start_time,
+            method,
+            path,
+            user_agent,
+            body,
+            is_blocked,
+            is_websocket,
+            batch_id,
+            request_headers,
+        ) in requests:
+            _, status, response_body, response_headers = responses.get(request_id, NO_RESPONSE)
             contexts.append(
                 RequestContext(
-                    id=r["id"],
-                    port=r["port"],
-                    start_time=r["start_time"],
-                    method=r["method"],
-                    path=r["path"],
-                    user_agent=r["user_agent"],
-                    body=r["body"],
-                    is_blocked=bool(r["is_blocked"]),
-                    is_websocket=bool(r["is_websocket"]),
-                    status=response["status"] if response else None,
-                    response_body=response["body"] if response else None,
-                    request_headers=request_headers.get(r["id"], {}),
-                    response_headers=response_headers.get(response_id, {}) if response_id else {},
-                    batch_id=r["batch_id"],
+                    id=request_id,
+                    port=port,
+                    start_time=start_time,
+                    method=method,
+                    path=path,
+                    user_agent=user_agent,
+                    body=body,
+                    is_blocked=bool(is_blocked),
+                    is_websocket=bool(is_websocket),
+                    status=status,
+                    response_body=response_body,
+                    request_headers=parse_headers_dict(request_headers),
+                    response_headers=parse_headers_dict(response_headers),
+                    batch_id=batch_id,
                 )
             )
         return contexts
@@ -85,7 +94,8 @@ class SourceReader:
         with self.connect() as conn:
             if not self.db.table_exists(conn, "tcp_connection"):
                 return []
-            connections = self.db.tcp_connections.read_after(conn, last_id, limit)
+            cursor = conn.cursor(row_factory=tuple_row)
+            connections = self.db.tcp_connections.read_after(cursor, last_id, limit)
             return self.hydrate_tcp(conn, connections)
 
     def read_tcp_backfill(
@@ -94,7 +104,8 @@ class SourceReader:
         with self.connect() as conn:
             if not self.db.table_exists(conn, "tcp_connection"):
                 return []
-            connections = self.db.tcp_connections.read_range(conn, last_id, target_id, ports, limit)
+            cursor = conn.cursor(row_factory=tuple_row)
+            connections = self.db.tcp_connections.read_range(cursor, last_id, target_id, ports, limit)
             return self.hydrate_tcp(conn, connections)
 
     def read_tcp_by_ids(self, ids: list[int]) -> list[ConnectionContext]:
@@ -103,41 +114,59 @@ class SourceReader:
         with self.connect() as conn:
             if not self.db.table_exists(conn, "tcp_connection"):
                 return []
-            connections = self.db.tcp_connections.read_by_ids(conn, ids)
+            cursor = conn.cursor(row_factory=tuple_row)
+            connections = self.db.tcp_connections.read_by_ids(cursor, ids)
             return self.hydrate_tcp(conn, connections)
 
     def hydrate_tcp(self, conn, connections) -> list[ConnectionContext]:
         if not connections:
             return []
 
-        connection_ids = [c["id"] for c in connections]
+        connection_ids = [c[0] for c in connections]
 
         events: dict[int, list[TcpEvent]] = {}
-        for row in self.db.tcp_events.get_by_connection_ids(conn, connection_ids):
-            events.setdefault(row["connection_id"], []).append(
+        for (
+            connection_id,
+            event_type,
+            data_text,
+            data_size,
+            end_stream,
+            truncated,
+        ) in self.db.tcp_events.iter_by_connection_ids(conn, connection_ids):
+            events.setdefault(connection_id, []).append(
                 TcpEvent(
-                    event_type=row["event_type"],
-                    data_text=row["data_text"],
-                    data_size=row["data_size"],
-                    end_stream=bool(row["end_stream"]),
-                    truncated=bool(row["truncated"]),
+                    event_type=event_type,
+                    data_text=data_text,
+                    data_size=data_size,
+                    end_stream=bool(end_stream),
+                    truncated=bool(truncated),
                 )
             )
 
         contexts: list[ConnectionContext] = []
-        for c in connections:
+        for (
+            row_id,
+            port,
+            connection_id,
+            start_time,
+            duration_ms,
+            bytes_in,
+            bytes_out,
+            is_blocked,
+            batch_id,
+        ) in connections:
             contexts.append(
                 ConnectionContext(
-                    id=c["id"],
-                    port=c["port"],
-                    connection_id=c["connection_id"],
-                    start_time=c["start_time"],
-                    duration_ms=c["duration_ms"],
-                    bytes_in=c["bytes_in"],
-                    bytes_out=c["bytes_out"],
-                    is_blocked=bool(c["is_blocked"]),
-                    batch_id=c["batch_id"],
-                    events=tuple(events.get(c["id"], ())),
+                    id=row_id,
+                    port=port,
+                    connection_id=connection_id,
+                    start_time=start_time,
+                    duration_ms=duration_ms,
+                    bytes_in=bytes_in,
+                    bytes_out=bytes_out,
+                    is_blocked=bool(is_blocked),
+                    batch_id=batch_id,
+                    events=tuple(events.get(row_id, ())),
                 )
             )
         return contexts
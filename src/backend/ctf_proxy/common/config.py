@@ -1,15 +1,27 @@
 import hashlib
 import logging
+import re
 from enum import Enum
+from functools import cached_property
 from pathlib import Path
 
 import yaml
-from pydantic import BaseModel, Field, ValidationError, field_validator
+from pydantic import BaseModel, Field, ValidationError, field_validator, model_validator
 
 from ctf_proxy.common.watcher import Watcher
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_SESSION_COOKIE_NAMES = (
+    "session",
+    "sessid",
+    "sid",
+    "token",
+    "auth",
+    "sessionid",
+    ".AspNetCore.Identity.Application",
+)
+
 
 class ServiceType(Enum):
     HTTP = "http"
@@ -25,6 +37,27 @@ class IgnoredPathStat(BaseModel):
     )
 
 
+def compile_path_patterns(ignored_paths: list[IgnoredPathStat]) -> dict[str, list[re.Pattern]]:
+    # Plain rules of a method share one alternation. Rules with groups or inline
+    # flags would change meaning inside it, so those are matched on their own.
+    patterns: dict[str, list[re.Pattern]] = {}
+    combinable: dict[str, list[str]] = {}
+    for ignored in ignored_paths:
+        pattern = re.compile(ignored.path)
+        if pattern.groups or pattern.flags != re.UNICODE:
+            patterns.setdefault(ignored.method, []).append(pattern)
+        else:
+            combinable.setdefault(ignored.method, []).append(ignored.path)
+    for method, paths in combinable.items():
+        combined = re.compile("|".join(f"(?:{path})" for path in paths))
+        patterns.setdefault(method, []).insert(0, combined)
+    return patterns
+
+
+def compile_value_patterns(patterns: dict[str, str]) -> dict[str, re.Pattern]:
+    return {name: re.compile(pattern) for name, pattern in patterns.items()}
+
+
 class Service(BaseModel):
     name: str = Field(..., min_length=1, description="Service name")
     port: int = Field(..., ge=1, le=65535, description="Service port number")
@@ -50,32 +83,94 @@ class Service(BaseModel):
         description="Headers to ignore in stats (key-value pairs)",
     )
     session_cookie_names: list[str] = Field(
-        default_factory=lambda: [
-            "session",
-            "sessid",
-            "sid",
-            "token",
-            "auth",
-            "sessionid",
-            ".AspNetCore.Identity.Application",
-        ],
+        default_factory=lambda: list(DEFAULT_SESSION_COOKIE_NAMES),
         description="Cookie names to track for session management",
     )
     tcp_connection_stats_precision: int = Field(
         default=100, description="Precision for TCP connection stats buckets (bytes)"
     )
 
+    @cached_property
+    def session_cookie_name_set(self) -> frozenset[str]:
+        return frozenset(self.session_cookie_names)
+
+    @model_validator(mode="after")
+    def validate_ignore_patterns(self) -> "Service":
+        try:
+            _ = (
+                self.ignore_path_patterns,
+                self.ignore_query_param_patterns,
+                self.ignore_header_patterns,
+            )
+        except re.error as e:
+            raise ValueError(f"Invalid ignore pattern: {e}") from e
+        return self
+
+    @cached_property
+    def ignore_path_patterns(self) -> dict[str, list[re.Pattern]]:
+        return compile_path_patterns(self.ignore_path_stats)
+
+    def is_ignored_path(self, method: str, path: str) -> bool:
+        return any(p.fullmatch(path) for p in self.ignore_path_patterns.get(method, ()))
+
+    @cached_property
+    def ignore_query_param_patterns(self) -> dict[str, re.Pattern]:
+        return compile_value_patterns(self.ignore_query_param_stats)
+
+    @cached_property
+    def ignored_header_names(self) -> frozenset[str]:
+        return frozenset(
+            name for name, pattern in self.ignore_header_stats.items() if pattern == ".*"
+        )
+
+    @cached_property
+    def ignore_header_patterns(self) -> dict[str, re.Pattern]:
+        return compile_value_patterns(
+            {
+                name: pattern
+                for name, pattern in self.ignore_header_stats.items()
+                if name not in self.ignored_header_names
+            }
+        )
+
 
 class ConfigError(Exception):
     pass
 
 
 class ConfigModel(BaseModel):
-    flag_format: str = Field(default="ctf{}", description="Flag format string")
+    flag_format: str = Field(
+        default="ctf{}",
+        description=(
+            "Flag regex, ASCII only. It is matched against raw body bytes, so \\w, \\d, \\s "
+            "and (?i) only cover ASCII and flag offsets are byte offsets"
+        ),
+    )
     api_token_hash: str = Field(
         default="", description="SHA256 hash of API token for authentication"
     )
     services: list[Service] = Field(default_factory=list, description="List of services")
+    session_max_age_seconds: int = Field(
+        default=3600,
+        ge=0,
+        description="How long tracked sessions are kept in memory for linking (0 keeps forever)",
+    )
+
+    @cached_property
+    def flag_pattern(self) -> re.Pattern[bytes]:
+        return re.compile(self.flag_format.encode())
+
+    @model_validator(mode="after")
+    def validate_flag_format(self) -> "ConfigModel":
+        if not self.flag_format.isascii():
+            raise ValueError(
+                "Invalid flag format pattern: must be ASCII, flags are matched on bytes"
+            )
+        try:
+            _ = self.flag_pattern
+        except re.error as e:
+            raise ValueError(f"Invalid flag format pattern: {e}") from e
+        return self
 
     @field_validator("services")
     @classmethod
@@ -95,13 +190,16 @@ def hash_token(token: str) -> str:
 
 class Config:
     flag_format: str
+    flag_pattern: re.Pattern[bytes]
     tcp_connection_stats_precision: int
     services: list[Service]
+    session_max_age_seconds: int
 
     def __init__(self, config_path: str | Path):
         self.config_path = Path(config_path)
         self._watcher: Watcher | None = None
         self._config = None
+        self.services_by_port: dict[int, Service] = {}
         self.load_config()
 
     def __getattr__(self, name):
@@ -131,6 +229,10 @@ class Config:
             self._config = ConfigModel(**config_data)
         except ValidationError as e:
             raise ConfigError("Configuration validation error") from e
+        self.index_services()
+
+    def index_services(self) -> None:
+        self.services_by_port = {service.port: service for service in self._config.services}
 
     @staticmethod
     def validate_content(content: str) -> tuple[bool, list[str]]:
@@ -164,7 +266,7 @@ class Config:
         except ValidationError as e:
             for error in e.errors():
                 field_path = " -> ".join(str(x) for x in error["loc"])
-                errors.append(f"{field_path}: {error['msg']}")
+                errors.append(f"{field_path}: {error['msg']}" if field_path else error["msg"])
             return False, errors
         except Exception as e:
             errors.append(f"Validation error: {str(e)}")
@@ -197,6 +299,7 @@ class Config:
         config_instance.config_path = Path(config_path)
         config_instance._watcher = None
         config_instance._config = ConfigModel(**config_data)
+        config_instance.index_services()
         return config_instance
 
     @classmethod
@@ -218,10 +321,7 @@ class Config:
         return None
 
     def get_service_by_port(self, port: int) -> Service | None:
-        for service in self.services:
-            if service.port == port:
-                return service
-        return None
+        return self.services_by_port.get(port)
 
     def get_services_by_type(self, service_type: ServiceType) -> list[Service]:
         return [service for service in self.services if service.type == service_type]
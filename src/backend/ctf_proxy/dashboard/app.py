@@ -11,6 +11,7 @@ import psycopg
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
+from psycopg.rows import tuple_row
 from pydantic import BaseModel, Field
 
 from ctf_proxy.analytics.schemas import (
@@ -224,59 +225,36 @@ async def export_sql_csv(request: dict):
 
 def get_all_services_stats_optimized(ports: list[int], db_instance) -> dict:
     """Fetch stats for all services in optimized batch queries."""
-    import logging
-
-    logging.basicConfig(level=logging.INFO)
-    logger = logging.getLogger(__name__)
-
     with db_instance.connect() as conn:
-        cursor = conn.cursor()
+        cursor = conn.cursor(row_factory=tuple_row)
 
         five_minutes_ago = int(time.time() * 1000) - (5 * 60 * 1000)
 
-        # 1. Get service stats for all ports at once
-        start = time.time()
-        service_stats = {row[0]: row[1:] for row in queries.service_stats_by_ports(cursor, ports)}
-        logger.info(f"Query 1 (service_stats): {time.time() - start:.3f}s")
-
-        # 2. Get response code stats for all ports
-        start = time.time()
+        service_stats = {}
         response_codes = {}
-        for port, status_code, count in queries.response_code_stats_by_ports(cursor, ports):
-            if port not in response_codes:
-                response_codes[port] = {}
-            response_codes[port][status_code] = count
-        logger.info(f"Query 2 (response_codes): {time.time() - start:.3f}s")
-
-        # 3. Skip unique paths count - too slow with large datasets
+        request_deltas = {}
+        blocked_request_deltas = {}
+        flag_deltas = {}
+        for tag, port, *values in queries.services_rollup(cursor, ports, five_minutes_ago):
+            if tag == "s":
+                service_stats[port] = values[:7]
+            elif tag == "c":
+                response_codes.setdefault(port, {})[values[0]] = values[1]
+            elif tag == "r":
+                request_deltas[port] = values[0]
+                blocked_request_deltas[port] = values[1]
+            else:
+                flag_deltas[port] = (values[0] or 0, values[1] or 0)
+
+        # Skip unique paths count - too slow with large datasets
         unique_paths = {}
 
-        # 4. Skip header stats - too slow with large datasets
+        # Skip header stats - too slow with large datasets
         header_stats = {}
 
-        # 7. Skip TCP stats for now - tcp_stats table is not populated
+        # Skip TCP stats for now - tcp_stats table is not populated
         tcp_stats = {}
 
-        # 8. Get request count delta for last 5 minutes using stats table
-        start = time.time()
-        request_deltas = dict(queries.request_count_deltas(cursor, ports, five_minutes_ago))
-        logger.info(f"Query 8 (request_deltas): {time.time() - start:.3f}s")
-
-        # 9. Get blocked request count delta for last 5 minutes using stats table
-        start = time.time()
-        blocked_request_deltas = dict(
-            queries.blocked_request_count_deltas(cursor, ports, five_minutes_ago)
-        )
-        logger.info(f"Query 9 (blocked_request_deltas): {time.time() - start:.3f}s")
-
-        # 10. Get flag deltas for last 5 minutes
-        start = time.time()
-        flag_deltas = {}
-        for row in queries.flag_deltas_by_ports(cursor, ports, five_minutes_ago):
-            port, written, retrieved = row
-            flag_deltas[port] = (written or 0, retrieved or 0)
-        logger.info(f"Query 10 (flag_deltas): {time.time() - start:.3f}s")
-
         # Combine all stats
         result = {}
         for port in ports:
@@ -412,7 +390,7 @@ async def get_service_by_port(port: int) -> ServiceListItem:
     five_minutes_ago = int(time.time() * 1000) - (5 * 60 * 1000)
 
     with db.connect() as conn:
-        cursor = conn.cursor()
+        cursor = conn.cursor(row_factory=tuple_row)
 
         # Use stats table instead of raw http_request table
         start = time.time()
@@ -565,7 +543,7 @@ async def get_request_detail(request_id: int) -> RequestDetailResponse:
         raise HTTPException(status_code=500, detail="Server not properly initialized")
 
     with db.connect() as conn:
-        cursor = conn.cursor()
+        cursor = conn.cursor(row_factory=tuple_row)
 
         # Get request data
         row = queries.http_request_detail(cursor, request_id)
@@ -616,40 +594,32 @@ async def get_request_detail(request_id: int) -> RequestDetailResponse:
 
         # Get all requests in the same session with session key
         linked_info = queries.linked_session_requests(cursor, request_id)
-        incoming_ids = [row[0] for row in linked_info if row[1] == "incoming"]
-        outgoing_ids = [row[0] for row in linked_info if row[1] == "outgoing"]
         session_key = linked_info[0][2] if linked_info else None
 
-        # Get info for all linked requests
-        all_linked_ids = incoming_ids + outgoing_ids
-        if all_linked_ids:
-            for req_id, link_method, link_path, link_start_time in queries.http_requests_basic(
-                cursor, all_linked_ids
-            ):
-                # Parse path
-                if "?" in link_path:
-                    link_path_part, _ = link_path.split("?", 1)
-                else:
-                    link_path_part = link_path
+        for req_id, direction, _, link_method, link_path, link_start_time in linked_info:
+            # Parse path
+            if "?" in link_path:
+                link_path_part, _ = link_path.split("?", 1)
+            else:
+                link_path_part = link_path
 
-                # Convert timestamp
-                link_timestamp = (
-                    convert_timestamp_to_datetime(link_start_time)
-                    if link_start_time
-                    else datetime.now()
-                )
+            # Convert timestamp
+            link_timestamp = (
+                convert_timestamp_to_datetime(link_start_time)
+                if link_start_time
+                else datetime.now()
+            )
 
-                direction = "incoming" if req_id in incoming_ids else "outgoing"
-                linked_requests.append(
-                    LinkedRequestItem(
-                        id=req_id,
-                        method=link_method,
-                        path=link_path_part,
-                        time=link_timestamp.strftime("%H:%M:%S"),
-                        direction=direction,
-                        session_key=session_key,
-                    )
+            linked_requests.append(
+                LinkedRequestItem(
+                    id=req_id,
+                    method=link_method,
+                    path=link_path_part,
+                    time=link_timestamp.strftime("%H:%M:%S"),
+                    direction=direction,
+                    session_key=session_key,
                 )
+            )
 
         # Convert timestamp
         timestamp = convert_timestamp_to_datetime(start_time) if start_time else datetime.now()
@@ -906,7 +876,7 @@ def get_tcp_stats_for_port(port: int) -> TCPStats | None:
         return None
 
     with db.connect() as conn:
-        cursor = conn.cursor()
+        cursor = conn.cursor(row_factory=tuple_row)
         row = queries.tcp_stats_for_port(cursor, port)
         if not row:
             return TCPStats(
@@ -993,7 +963,7 @@ async def get_tcp_connection_detail(connection_id: int) -> TCPConnectionDetail:
         raise HTTPException(status_code=500, detail="Server not properly initialized")
 
     with db.connect() as conn:
-        cursor = conn.cursor()
+        cursor = conn.cursor(row_factory=tuple_row)
 
         row = queries.tcp_connection_detail(cursor, connection_id)
         if not row:
@@ -1058,7 +1028,7 @@ def get_tcp_connection_stats(port: int, window_minutes: int = 60) -> TCPConnecti
     precision = service.tcp_connection_stats_precision
 
     with db.connect() as conn:
-        cursor = conn.cursor()
+        cursor = conn.cursor(row_factory=tuple_row)
 
         # Get time-based stats for the window
         # Group by byte ranges and create time series
@@ -1125,7 +1095,7 @@ async def get_websocket_connections(
     offset = (page - 1) * page_size
 
     with db.connect() as conn:
-        cursor = conn.cursor()
+        cursor = conn.cursor(row_factory=tuple_row)
 
         total, rows = queries.list_websocket_connections(cursor, port, page_size, offset)
 
@@ -1165,7 +1135,7 @@ async def get_websocket_connection_detail(connection_id: int) -> WebSocketConnec
         raise HTTPException(status_code=500, detail="Server not properly initialized")
 
     with db.connect() as conn:
-        cursor = conn.cursor()
+        cursor = conn.cursor(row_factory=tuple_row)
 
         row = queries.websocket_connection_detail(cursor, connection_id)
         if not row:
@@ -1217,7 +1187,7 @@ def get_recent_flag_stats() -> FlagTimeStatsResponse:
     five_minutes_ago = int(time.time() * 1000) - (5 * 60 * 1000)
 
     with db.connect() as conn:
-        cursor = conn.cursor()
+        cursor = conn.cursor(row_factory=tuple_row)
 
         stats = []
         for row in queries.recent_flag_stats(cursor, five_minutes_ago):
@@ -1248,7 +1218,7 @@ def get_service_flag_time_stats(port: int, window_minutes: int = 60) -> FlagTime
     start_time = int(time.time() * 1000) - (window_minutes * 60 * 1000)
 
     with db.connect() as conn:
-        cursor = conn.cursor()
+        cursor = conn.cursor(row_factory=tuple_row)
 
         stats = []
         for row in queries.flag_time_stats_for_port(cursor, port, start_time):
@@ -1282,7 +1252,7 @@ def get_service_request_time_stats(port: int, window_minutes: int = 60) -> Reque
     start_time = int(time.time() * 1000) - (window_minutes * 60 * 1000)
 
     with db.connect() as conn:
-        cursor = conn.cursor()
+        cursor = conn.cursor(row_factory=tuple_row)
 
         stats = []
         for row in queries.request_time_stats_for_port(cursor, port, start_time):
@@ -1308,7 +1278,7 @@ def get_all_request_time_stats(window_minutes: int = 60) -> RequestTimeStatsResp
     start_time = int(time.time() * 1000) - (window_minutes * 60 * 1000)
 
     with db.connect() as conn:
-        cursor = conn.cursor()
+        cursor = conn.cursor(row_factory=tuple_row)
 
         stats = []
         for row in queries.all_request_time_stats(cursor, start_time):
@@ -1334,7 +1304,7 @@ def get_all_flag_time_stats(window_minutes: int = 60) -> FlagTimeStatsResponse:
     start_time = int(time.time() * 1000) - (window_minutes * 60 * 1000)
 
     with db.connect() as conn:
-        cursor = conn.cursor()
+        cursor = conn.cursor(row_factory=tuple_row)
 
         stats = []
         for row in queries.all_flag_time_stats(cursor, start_time):
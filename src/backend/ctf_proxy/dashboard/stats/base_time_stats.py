@@ -1,5 +1,7 @@
 from datetime import datetime
 
+from psycopg.rows import tuple_row
+
 from ctf_proxy.db import ProxyStatsDB
 from ctf_proxy.db.dashboard_queries import DashboardQueries
 from ctf_proxy.db.utils import convert_datetime_to_timestamp
@@ -18,7 +20,7 @@ class BaseTimeStats:
     ) -> dict[tuple[str, ...], dict]:
         """Get time series data for all key combinations on a specific port for the specified time window with 1-minute precision, including totals."""
         with self.db.connect() as conn:
-            cursor = conn.cursor()
+            cursor = conn.cursor(row_factory=tuple_row)
 
             # Get current time
             now = datetime.now()
@@ -102,7 +104,7 @@ class BaseTimeStats:
     ) -> dict[tuple[str, ...], dict]:
         """Get time series data for a specific time range."""
         with self.db.connect() as conn:
-            cursor = conn.cursor()
+            cursor = conn.cursor(row_factory=tuple_row)
 
             # Convert to timestamps (milliseconds)
             start_ms = convert_datetime_to_timestamp(start_time)
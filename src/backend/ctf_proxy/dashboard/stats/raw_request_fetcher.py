@@ -2,6 +2,8 @@ import json
 import os
 import tarfile
 
+from psycopg.rows import tuple_row
+
 from ctf_proxy.db import ProxyStatsDB
 from ctf_proxy.db.dashboard_queries import DashboardQueries
 
@@ -18,7 +20,7 @@ def fetch_raw_request(
     3. Extracting the JSON file from the archive
     """
     with db.connect() as conn:
-        cursor = conn.cursor()
+        cursor = conn.cursor(row_factory=tuple_row)
         result = queries.request_batch_tap(cursor, request_id)
 
         if not result:
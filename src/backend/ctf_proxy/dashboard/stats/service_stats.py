@@ -1,6 +1,8 @@
 import time
 from datetime import datetime
 
+from psycopg.rows import tuple_row
+
 from ctf_proxy.db import ProxyStatsDB
 from ctf_proxy.db.dashboard_queries import DashboardQueries
 
@@ -14,7 +16,7 @@ class ServiceStats:
 
     def get_current_stats(self) -> dict:
         with self.db.connect() as conn:
-            cursor = conn.cursor()
+            cursor = conn.cursor(row_factory=tuple_row)
 
             service_stats_row = self.queries.service_stats_for_port(cursor, self.service_port)
 
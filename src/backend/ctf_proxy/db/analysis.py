@@ -13,16 +13,18 @@ logger = logging.getLogger(__name__)
 
 
 class AnalysisDB:
+    rules = RuleTable()
+    http_results = HttpAnalysisResultTable()
+    tcp_results = TcpAnalysisResultTable()
+    cursors = AnalysisCursorTable()
+    backfill = BackfillJobTable()
+    rules_source = RuleSourceTable()
+
     def __init__(self):
-        self.rules = RuleTable()
-        self.http_results = HttpAnalysisResultTable()
-        self.tcp_results = TcpAnalysisResultTable()
-        self.cursors = AnalysisCursorTable()
-        self.backfill = BackfillJobTable()
-        self.rules_source = RuleSourceTable()
+        self.pool = connection.ConnectionPool()
 
     def connect(self):
-        return connection.connect()
+        return self.pool.connection()
 
     def init_schema(self, schema_file: str | None = None) -> None:
         if schema_file is None:
@@ -36,7 +38,7 @@ class AnalysisDB:
         with open(dashboard_file) as f:
             dashboard_sql = f.read()
 
-        with self.connect() as conn:
+        with connection.connect() as conn:
             conn.execute(schema_sql)
             conn.execute(dashboard_sql)
             conn.commit()
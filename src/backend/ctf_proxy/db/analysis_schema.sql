@@ -73,6 +73,7 @@ CREATE TABLE IF NOT EXISTS tag_time_stats (
     count BIGINT NOT NULL DEFAULT 0,
     FOREIGN KEY (rule_id) REFERENCES rule (id)
 );
+ALTER TABLE tag_time_stats SET (fillfactor = 70);
 
 CREATE UNIQUE INDEX IF NOT EXISTS tag_time_stats_unique
     ON tag_time_stats(port, rule_id, tag, source, time);
@@ -7,7 +7,7 @@ class RowStatus(enum.Enum):
     UPDATED = "updated"
 
 
-@dataclass
+@dataclass(slots=True)
 class TimeStatsRow:
     id: int
     port: int
@@ -15,14 +15,14 @@ class TimeStatsRow:
     count: int
 
 
-@dataclass
+@dataclass(slots=True)
 class TimeStatsInsertRow:
     port: int
     time: int
     count: int
 
 
-@dataclass
+@dataclass(slots=True)
 class TimeStatsIncrementRow:
     port: int
     time: int
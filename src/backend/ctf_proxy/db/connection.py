@@ -1,6 +1,10 @@
 import os
+import queue
+from collections.abc import Iterator
+from contextlib import contextmanager, suppress
 
 import psycopg
+from psycopg.pq import TransactionStatus
 from psycopg.rows import RowMaker
 
 SEARCH_PATH = "logs,analytics,dashboard,public"
@@ -12,15 +16,15 @@ def nul_safe(value):
     return value
 
 
-def dsn(statement_timeout_ms: int | None = None) -> str:
+def dsn(synchronous_commit: bool = True) -> str:
     host = os.environ.get("PGHOST", "localhost")
     port = os.environ.get("PGPORT", "5433")
     user = os.environ.get("PGUSER", "ctf")
     password = os.environ.get("PGPASSWORD", "ctf")
     database = os.environ.get("PGDATABASE", "ctf")
     options = f"-c search_path={SEARCH_PATH}"
-    if statement_timeout_ms is not None:
-        options += f" -c statement_timeout={statement_timeout_ms}"
+    if not synchronous_commit:
+        options += " -c synchronous_commit=off"
     return (
         f"host={host} port={port} user={user} password={password} "
         f"dbname={database} options='{options}'"
@@ -35,13 +39,17 @@ def describe() -> str:
 
 
 class Row:
-    def __init__(self, columns, values):
+    __slots__ = ("columns", "values", "index")
+
+    def __init__(self, columns, values, index=None):
         self.columns = columns
         self.values = values
-        self.mapping = dict(zip(columns, values, strict=False))
+        self.index = index if index is not None else column_index(columns)
 
     def __getitem__(self, key):
-        return self.values[key] if isinstance(key, int | slice) else self.mapping[key]
+        if isinstance(key, int | slice):
+            return self.values[key]
+        return self.values[self.index[key]]
 
     def __iter__(self):
         return iter(self.values)
@@ -61,24 +69,79 @@ class Row:
     __hash__ = None
 
     def __repr__(self):
-        return f"Row({self.mapping!r})"
+        return f"Row({dict(zip(self.columns, self.values, strict=False))!r})"
 
     def keys(self):
         return list(self.columns)
 
     def get(self, key, default=None):
-        return self.mapping.get(key, default)
+        i = self.index.get(key)
+        return default if i is None else self.values[i]
+
+
+def column_index(columns) -> dict:
+    return {name: i for i, name in enumerate(columns)}
 
 
 def row_factory(cursor) -> RowMaker:
     description = cursor.description
     columns = [col.name for col in description] if description else []
+    index = column_index(columns)
 
     def make_row(values) -> Row:
-        return Row(columns, values)
+        return Row(columns, values, index)
 
     return make_row
 
 
-def connect(statement_timeout_ms: int | None = None) -> psycopg.Connection:
-    return psycopg.connect(dsn(statement_timeout_ms), row_factory=row_factory)
+def connect(synchronous_commit: bool = True) -> psycopg.Connection:
+    return psycopg.connect(dsn(synchronous_commit), row_factory=row_factory)
+
+
+class ConnectionPool:
+    """Reusable connections handed out one at a time, for short request-scoped work."""
+
+    def __init__(self, size: int = 8, **connect_kwargs):
+        self.connect_kwargs = connect_kwargs
+        self.idle: queue.LifoQueue[psycopg.Connection] = queue.LifoQueue(maxsize=size)
+
+    @contextmanager
+    def connection(self) -> Iterator[psycopg.Connection]:
+        conn = self.acquire()
+        try:
+            yield conn
+        except BaseException:
+            with suppress(psycopg.Error):
+                conn.rollback()
+            raise
+        else:
+            conn.commit()
+        finally:
+            self.release(conn)
+
+    def acquire(self) -> psycopg.Connection:
+        while True:
+            try:
+                conn = self.idle.get_nowait()
+            except queue.Empty:
+                return connect(**self.connect_kwargs)
+            if not conn.closed:
+                return conn
+
+    def release(self, conn: psycopg.Connection) -> None:
+        if conn.closed:
+            return
+        if conn.info.transaction_status != TransactionStatus.IDLE:
+            conn.close()
+            return
+        try:
+            self.idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def close(self) -> None:
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                return
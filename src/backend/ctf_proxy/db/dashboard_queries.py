@@ -21,62 +21,35 @@ class DashboardQueries:
             [f"%{search}%"],
         )
 
-    def service_stats_by_ports(self, cursor: Cursor, ports: list[int]) -> list:
-        placeholders = ",".join(["%s"] * len(ports))
-        cursor.execute(
-            f"""SELECT port, total_requests, total_blocked_requests, total_responses, total_blocked_responses,
-                      total_flags_written, total_flags_retrieved, total_flags_blocked
-               FROM service_stats WHERE port IN ({placeholders})""",
-            ports,
-        )
-        return cursor.fetchall()
-
-    def response_code_stats_by_ports(self, cursor: Cursor, ports: list[int]) -> list:
-        placeholders = ",".join(["%s"] * len(ports))
-        cursor.execute(
-            f"""SELECT port, status_code, count
-               FROM http_response_code_stats
-               WHERE port IN ({placeholders})
-               ORDER BY port, count DESC""",
-            ports,
-        )
-        return cursor.fetchall()
-
-    def request_count_deltas(self, cursor: Cursor, ports: list[int], since: int) -> list:
-        placeholders = ",".join(["%s"] * len(ports))
-        cursor.execute(
-            f"""SELECT port, SUM(count) as recent_count
-               FROM http_request_time_stats
-               WHERE port IN ({placeholders})
-                 AND time >= %s
-               GROUP BY port""",
-            ports + [since],
-        )
-        return cursor.fetchall()
+    def services_rollup(self, cursor: Cursor, ports: list[int], since: int) -> list:
+        """Service totals, response codes and recent request/flag deltas in one query.
 
-    def blocked_request_count_deltas(self, cursor: Cursor, ports: list[int], since: int) -> list:
+        Rows are (tag, port, *values): 's' service_stats totals, 'c' (status_code,
+        count), 'r' (recent_count, recent_blocked_count), 'f' (written, retrieved).
+        """
         placeholders = ",".join(["%s"] * len(ports))
         cursor.execute(
-            f"""SELECT port, SUM(blocked_count) as recent_blocked_count
+            f"""SELECT 's', port, total_requests, total_blocked_requests, total_responses,
+                      total_blocked_responses, total_flags_written, total_flags_retrieved,
+                      total_flags_blocked
+               FROM service_stats WHERE port IN ({placeholders})
+               UNION ALL
+               SELECT 'c', port, status_code, count, NULL, NULL, NULL, NULL, NULL
+               FROM http_response_code_stats WHERE port IN ({placeholders})
+               UNION ALL
+               SELECT 'r', port, SUM(count)::bigint, SUM(blocked_count)::bigint,
+                      NULL, NULL, NULL, NULL, NULL
                FROM http_request_time_stats
-               WHERE port IN ({placeholders})
-                 AND time >= %s
-               GROUP BY port""",
-            ports + [since],
-        )
-        return cursor.fetchall()
-
-    def flag_deltas_by_ports(self, cursor: Cursor, ports: list[int], since: int) -> list:
-        placeholders = ",".join(["%s"] * len(ports))
-        cursor.execute(
-            f"""SELECT port,
-                       SUM(write_count) as flags_written_delta,
-                       SUM(read_count) as flags_retrieved_delta
+               WHERE port IN ({placeholders}) AND time >= %s
+               GROUP BY port
+               UNION ALL
+               SELECT 'f', port, SUM(write_count)::bigint, SUM(read_count)::bigint,
+                      NULL, NULL, NULL, NULL, NULL
                FROM flag_time_stats
-               WHERE port IN ({placeholders})
-                 AND time >= %s
-               GROUP BY port""",
-            ports + [since],
+               WHERE port IN ({placeholders}) AND time >= %s
+               GROUP BY port
+               ORDER BY 1, 2, 4 DESC""",
+            ports + ports + ports + [since] + ports + [since],
         )
         return cursor.fetchall()
 
@@ -268,6 +241,7 @@ class DashboardQueries:
             SELECT id, value, location
             FROM flag
             WHERE http_request_id = %s
+            ORDER BY id
             """,
             (request_id,),
         )
@@ -276,15 +250,20 @@ class DashboardQueries:
     def linked_session_requests(self, cursor: Cursor, request_id: int) -> list:
         cursor.execute(
             """
-            SELECT DISTINCT sl2.http_request_id,
+            SELECT DISTINCT ON (sl2.http_request_id)
+                   sl2.http_request_id,
                    CASE
                      WHEN sl2.http_request_id < %s THEN 'incoming'
                      WHEN sl2.http_request_id > %s THEN 'outgoing'
                    END as direction,
-                   s.key as session_key
+                   s.key as session_key,
+                   req.method,
+                   req.path,
+                   req.start_time
             FROM session_link sl1
             JOIN session_link sl2 ON sl1.session_id = sl2.session_id
             JOIN session s ON s.id = sl1.session_id
+            JOIN http_request req ON req.id = sl2.http_request_id
             WHERE sl1.http_request_id = %s
               AND sl2.http_request_id != %s
             ORDER BY sl2.http_request_id
@@ -293,18 +272,6 @@ class DashboardQueries:
         )
         return cursor.fetchall()
 
-    def http_requests_basic(self, cursor: Cursor, ids: list[int]) -> list:
-        placeholders = ",".join("%s" for _ in ids)
-        cursor.execute(
-            f"""
-                SELECT id, method, path, start_time
-                FROM http_request
-                WHERE id IN ({placeholders})
-                """,
-            ids,
-        )
-        return cursor.fetchall()
-
     def websocket_connection_id_for_request(self, cursor: Cursor, request_id: int) -> tuple:
         cursor.execute(
             """
@@ -348,6 +315,7 @@ class DashboardQueries:
                 SELECT id, value, location
                 FROM flag
                 WHERE http_response_id = %s
+                ORDER BY id
                 """,
             (response_id,),
         )
@@ -707,7 +675,7 @@ class DashboardQueries:
 
     def distinct_path_count_for_port(self, cursor: Cursor, port: int) -> tuple:
         cursor.execute(
-            """SELECT COUNT(DISTINCT path) FROM http_path_stats WHERE port = %s""",
+            """SELECT COUNT(*) FROM http_path_stats WHERE port = %s""",
             (port,),
         )
         return cursor.fetchone()
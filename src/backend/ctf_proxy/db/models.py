@@ -3,9 +3,13 @@
 import logging
 import os
 import time
+from collections.abc import Iterator
+from contextlib import contextmanager
 from dataclasses import dataclass
 
 import psycopg
+from psycopg import Cursor
+from psycopg.rows import dict_row
 
 from ctf_proxy.db import connection
 from ctf_proxy.db.base import RowStatus
@@ -44,6 +48,8 @@ from ctf_proxy.db.tables.websocket_frame import WebSocketFrameRow, WebSocketFram
 
 logger = logging.getLogger(__name__)
 
+SET_LOCAL_TIMEOUT_SQL = "SELECT set_config('statement_timeout', %s, true)"
+
 
 __all__ = [
     "RowStatus",
@@ -96,31 +102,43 @@ class SqlExecutionResult:
 
 
 class ProxyStatsDB:
+    http_requests = HttpRequestTable()
+    http_responses = HttpResponseTable()
+    http_headers = HttpHeaderTable()
+    flags = FlagTable()
+    service_stats = ServiceStatsTable()
+    http_response_code_stats = HttpResponseCodeStatsTable()
+    http_path_stats = HttpPathStatsTable()
+    http_path_time_stats = HttpPathTimeStatsTable()
+    http_query_param_time_stats = HttpQueryParamTimeStatsTable()
+    http_header_time_stats = HttpHeaderTimeStatsTable()
+    http_request_time_stats = HttpRequestTimeStatsTable()
+    flag_time_stats = FlagTimeStatsTable()
+    sessions = SessionTable()
+    session_links = SessionLinkTable()
+    tcp_connections = TcpConnectionTable()
+    tcp_events = TcpEventTable()
+    tcp_connection_stats = TcpConnectionStatsTable()
+    tcp_connection_time_stats = TcpConnectionTimeStatsTable()
+    tcp_stats = TcpStatsTable()
+    websocket_connections = WebSocketConnectionTable()
+    websocket_frames = WebSocketFrameTable()
+
     def __init__(self):
-        self.http_requests = HttpRequestTable()
-        self.http_responses = HttpResponseTable()
-        self.http_headers = HttpHeaderTable()
-        self.flags = FlagTable()
-        self.service_stats = ServiceStatsTable()
-        self.http_response_code_stats = HttpResponseCodeStatsTable()
-        self.http_path_stats = HttpPathStatsTable()
-        self.http_path_time_stats = HttpPathTimeStatsTable()
-        self.http_query_param_time_stats = HttpQueryParamTimeStatsTable()
-        self.http_header_time_stats = HttpHeaderTimeStatsTable()
-        self.http_request_time_stats = HttpRequestTimeStatsTable()
-        self.flag_time_stats = FlagTimeStatsTable()
-        self.sessions = SessionTable()
-        self.session_links = SessionLinkTable()
-        self.tcp_connections = TcpConnectionTable()
-        self.tcp_events = TcpEventTable()
-        self.tcp_connection_stats = TcpConnectionStatsTable()
-        self.tcp_connection_time_stats = TcpConnectionTimeStatsTable()
-        self.tcp_stats = TcpStatsTable()
-        self.websocket_connections = WebSocketConnectionTable()
-        self.websocket_frames = WebSocketFrameTable()
-
-    def connect(self):
-        return connection.connect()
+        self.pool = connection.ConnectionPool()
+        self.writer_pool = connection.ConnectionPool(size=1, synchronous_commit=False)
+
+    def connect(self, synchronous_commit: bool = True):
+        if not synchronous_commit:
+            return self.writer_pool.connection()
+        return self.pool.connection()
+
+    @contextmanager
+    def writer(self) -> Iterator[Cursor]:
+        """Cursor for one ingestion unit of work, committed as a single transaction on
+        success and rolled back on error."""
+        with self.connect(synchronous_commit=False) as conn, conn.transaction():
+            yield conn.cursor()
 
     def table_exists(self, tx, name: str) -> bool:
         qualified = name if "." in name else f"logs.{name}"
@@ -151,7 +169,7 @@ class ProxyStatsDB:
         with open(schema_file) as f:
             schema_sql = f.read()
 
-        with self.connect() as conn:
+        with connection.connect() as conn:
             conn.execute(schema_sql)
             conn.commit()
 
@@ -192,22 +210,19 @@ class ProxyStatsDB:
             query = f"{query} LIMIT {default_limit}"
 
         timeout_ms = int(timeout * 1000)
-        with connection.connect(statement_timeout_ms=timeout_ms) as conn:
-            cursor = conn.cursor()
-            start_time = time.perf_counter()
+        with self.pool.connection() as conn:
+            cursor = conn.cursor(row_factory=dict_row)
             try:
+                cursor.execute(SET_LOCAL_TIMEOUT_SQL, (str(timeout_ms),))
+                start_time = time.perf_counter()
                 cursor.execute(query)
-                rows = cursor.fetchall()
+                results = cursor.fetchall()
+                query_time = (time.perf_counter() - start_time) * 1000
+                columns = [column.name for column in cursor.description or ()]
             except psycopg.errors.QueryCanceled as e:
                 raise TimeoutError(f"Query execution exceeded {timeout} seconds timeout") from e
-            query_time = (time.perf_counter() - start_time) * 1000
-
-            if rows:
-                columns = list(rows[0].keys())
-                results = [dict(zip(columns, row, strict=False)) for row in rows]
-            else:
-                columns = []
-                results = []
+            finally:
+                conn.rollback()
 
         return SqlExecutionResult(rows=results, columns=columns, query_time_ms=query_time)
 
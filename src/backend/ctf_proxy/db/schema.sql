@@ -42,6 +42,7 @@ CREATE TABLE IF NOT EXISTS http_request_time_stats (
     count BIGINT NOT NULL DEFAULT 0,
     blocked_count BIGINT NOT NULL DEFAULT 0
 );
+ALTER TABLE http_request_time_stats SET (fillfactor = 70);
 
 CREATE UNIQUE INDEX IF NOT EXISTS http_request_time_stats_unique ON http_request_time_stats(port, time);
 
@@ -75,8 +76,10 @@ CREATE TABLE IF NOT EXISTS tcp_event (
     truncated BIGINT NOT NULL DEFAULT 0,
     FOREIGN KEY (connection_id) REFERENCES tcp_connection (id)
 );
+ALTER TABLE tcp_event SET (toast_tuple_target = 256);
 
-CREATE INDEX IF NOT EXISTS tcp_event_connection_id ON tcp_event(connection_id);
+DROP INDEX IF EXISTS tcp_event_connection_id;
+CREATE INDEX IF NOT EXISTS tcp_event_connection_id_timestamp ON tcp_event(connection_id, timestamp);
 CREATE INDEX IF NOT EXISTS tcp_event_timestamp ON tcp_event(timestamp);
 CREATE INDEX IF NOT EXISTS tcp_event_type ON tcp_event(event_type);
 CREATE INDEX IF NOT EXISTS tcp_event_data_text ON tcp_event(data_text);
@@ -101,7 +104,8 @@ CREATE TABLE IF NOT EXISTS websocket_frame (
     FOREIGN KEY (connection_id) REFERENCES websocket_connection (id)
 );
 
-CREATE INDEX IF NOT EXISTS websocket_frame_connection_id ON websocket_frame(connection_id);
+DROP INDEX IF EXISTS websocket_frame_connection_id;
+CREATE INDEX IF NOT EXISTS websocket_frame_connection_id_ord ON websocket_frame(connection_id, ord);
 
 CREATE TABLE IF NOT EXISTS flag (
     id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
@@ -122,8 +126,10 @@ CREATE TABLE IF NOT EXISTS flag (
     FOREIGN KEY (websocket_frame_id) REFERENCES websocket_frame (id)
 );
 
-CREATE INDEX IF NOT EXISTS flag_http_request_id ON flag(http_request_id);
-CREATE INDEX IF NOT EXISTS flag_http_response_id ON flag(http_response_id);
+DROP INDEX IF EXISTS flag_http_request_id;
+DROP INDEX IF EXISTS flag_http_response_id;
+CREATE INDEX IF NOT EXISTS flag_http_request_id_id ON flag(http_request_id, id);
+CREATE INDEX IF NOT EXISTS flag_http_response_id_id ON flag(http_response_id, id);
 CREATE INDEX IF NOT EXISTS flag_tcp_connection_id ON flag(tcp_connection_id);
 CREATE INDEX IF NOT EXISTS flag_tcp_event_id ON flag(tcp_event_id);
 CREATE INDEX IF NOT EXISTS flag_websocket_connection_id ON flag(websocket_connection_id);
@@ -136,6 +142,7 @@ CREATE TABLE IF NOT EXISTS flag_time_stats (
     write_count BIGINT NOT NULL DEFAULT 0,
     read_count BIGINT NOT NULL DEFAULT 0
 );
+ALTER TABLE flag_time_stats SET (fillfactor = 70);
 
 CREATE UNIQUE INDEX IF NOT EXISTS flag_time_stats_unique ON flag_time_stats(port, time);
 
@@ -152,6 +159,7 @@ CREATE TABLE IF NOT EXISTS service_stats (
     total_websocket_connections BIGINT NOT NULL DEFAULT 0,
     total_websocket_frames BIGINT NOT NULL DEFAULT 0
 );
+ALTER TABLE service_stats SET (fillfactor = 70);
 
 CREATE UNIQUE INDEX IF NOT EXISTS service_stats_unique_port ON service_stats(port);
 
@@ -161,17 +169,40 @@ CREATE TABLE IF NOT EXISTS http_response_code_stats (
     status_code BIGINT NOT NULL,
     count BIGINT NOT NULL DEFAULT 0
 );
+ALTER TABLE http_response_code_stats SET (fillfactor = 70);
 
 CREATE UNIQUE INDEX IF NOT EXISTS http_response_code_stats_unique ON http_response_code_stats(port, status_code);
 
+CREATE TABLE IF NOT EXISTS path_dim (
+    id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE
+);
+
 CREATE TABLE IF NOT EXISTS http_path_stats (
     id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
     port BIGINT NOT NULL,
-    path TEXT NOT NULL,
+    path_id BIGINT NOT NULL REFERENCES path_dim(id),
     count BIGINT NOT NULL DEFAULT 0
 );
-
-CREATE UNIQUE INDEX IF NOT EXISTS http_path_stats_unique ON http_path_stats(port, path);
+ALTER TABLE http_path_stats SET (fillfactor = 70);
+
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_schema = 'logs' AND table_name = 'http_path_stats' AND column_name = 'path'
+    ) THEN
+        INSERT INTO path_dim (path) SELECT DISTINCT path FROM http_path_stats
+        ON CONFLICT (path) DO NOTHING;
+        ALTER TABLE http_path_stats ADD COLUMN path_id BIGINT REFERENCES path_dim(id);
+        UPDATE http_path_stats s SET path_id = d.id FROM path_dim d WHERE d.path = s.path;
+        ALTER TABLE http_path_stats ALTER COLUMN path_id SET NOT NULL;
+        ALTER TABLE http_path_stats DROP COLUMN path;
+    END IF;
+END $$;
+
+DROP INDEX IF EXISTS http_path_stats_unique;
+CREATE UNIQUE INDEX IF NOT EXISTS http_path_stats_unique_path_id ON http_path_stats(port, path_id);
 
 CREATE TABLE IF NOT EXISTS http_path_time_stats (
     id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
@@ -181,6 +212,7 @@ CREATE TABLE IF NOT EXISTS http_path_time_stats (
     time BIGINT NOT NULL,
     count BIGINT NOT NULL DEFAULT 0
 );
+ALTER TABLE http_path_time_stats SET (fillfactor = 70);
 
 CREATE UNIQUE INDEX IF NOT EXISTS http_path_time_stats_unique ON http_path_time_stats(port, method, path, time);
 
@@ -192,6 +224,7 @@ CREATE TABLE IF NOT EXISTS http_query_param_time_stats (
     time BIGINT NOT NULL,
     count BIGINT NOT NULL DEFAULT 0
 );
+ALTER TABLE http_query_param_time_stats SET (fillfactor = 70);
 
 CREATE UNIQUE INDEX IF NOT EXISTS http_query_param_time_stats_unique ON http_query_param_time_stats(port, param, value, time);
 
@@ -203,6 +236,7 @@ CREATE TABLE IF NOT EXISTS http_header_time_stats (
     time BIGINT NOT NULL,
     count BIGINT NOT NULL DEFAULT 0
 );
+ALTER TABLE http_header_time_stats SET (fillfactor = 70);
 
 CREATE UNIQUE INDEX IF NOT EXISTS http_header_time_stats_unique ON http_header_time_stats(port, name, value, time);
 
@@ -222,7 +256,7 @@ CREATE TABLE IF NOT EXISTS session_link (
     FOREIGN KEY (http_request_id) REFERENCES http_request (id)
 );
 
-CREATE INDEX IF NOT EXISTS session_link_session_id ON session_link(session_id);
+DROP INDEX IF EXISTS session_link_session_id;
 CREATE INDEX IF NOT EXISTS session_link_http_request_id ON session_link(http_request_id);
 CREATE UNIQUE INDEX IF NOT EXISTS session_link_unique ON session_link(session_id, http_request_id);
 
@@ -235,6 +269,7 @@ CREATE TABLE IF NOT EXISTS tcp_stats (
     avg_duration_ms BIGINT NOT NULL DEFAULT 0,
     total_flags_found BIGINT NOT NULL DEFAULT 0
 );
+ALTER TABLE tcp_stats SET (fillfactor = 70);
 
 CREATE UNIQUE INDEX IF NOT EXISTS tcp_stats_unique_port ON tcp_stats(port);
 
@@ -247,6 +282,7 @@ CREATE TABLE IF NOT EXISTS tcp_connection_stats (
     write_max BIGINT NOT NULL,
     count BIGINT NOT NULL DEFAULT 0
 );
+ALTER TABLE tcp_connection_stats SET (fillfactor = 70);
 
 CREATE UNIQUE INDEX IF NOT EXISTS tcp_connection_stats_unique ON tcp_connection_stats(port, read_min, read_max, write_min, write_max);
 
@@ -260,5 +296,6 @@ CREATE TABLE IF NOT EXISTS tcp_connection_time_stats (
     time BIGINT NOT NULL,
     count BIGINT NOT NULL DEFAULT 0
 );
+ALTER TABLE tcp_connection_time_stats SET (fillfactor = 70);
 
 CREATE UNIQUE INDEX IF NOT EXISTS tcp_connection_time_stats_unique ON tcp_connection_time_stats(port, read_min, read_max, write_min, write_max, time);
@@ -4,6 +4,15 @@ from psycopg import Cursor
 
 MINUTE_MS = 60_000
 
+APPLY_TAG_TIME_DELTAS_SQL = """
+INSERT INTO tag_time_stats (port, rule_id, tag, source, time, count)
+SELECT d.port, d.rule_id, d.tag, %s, d.time, d.count
+FROM unnest(%s::bigint[], %s::bigint[], %s::text[], %s::bigint[], %s::bigint[])
+    AS d(port, rule_id, tag, time, count)
+ON CONFLICT (port, rule_id, tag, source, time)
+DO UPDATE SET count = tag_time_stats.count + EXCLUDED.count
+"""
+
 
 def minute_bucket(timestamp: int | None) -> int | None:
     if timestamp is None:
@@ -11,7 +20,7 @@ def minute_bucket(timestamp: int | None) -> int | None:
     return (timestamp // MINUTE_MS) * MINUTE_MS
 
 
-@dataclass
+@dataclass(slots=True)
 class AnalysisResultRow:
     rule_id: int
     tag: str
@@ -36,10 +45,10 @@ class AnalysisResultTable:
                 (rule_id, tag, meta, port, {self.ref_column}, created, event_time, batch_id)
             VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
             """,
-            [
+            (
                 (r.rule_id, r.tag, r.meta, r.port, r.ref_id, created, r.event_time, r.batch_id)
                 for r in results
-            ],
+            ),
         )
         deltas: dict[tuple, int] = {}
         for r in results:
@@ -74,21 +83,12 @@ class AnalysisResultTable:
         )
 
     def apply_tag_time_deltas(self, tx: Cursor, deltas: dict[tuple, int]) -> None:
-        for (port, rule_id, tag, bucket), delta in deltas.items():
-            if delta == 0:
-                continue
-            tx.execute(
-                """
-                UPDATE tag_time_stats SET count = count + %s
-                WHERE port = %s AND rule_id = %s AND tag = %s AND source = %s AND time = %s
-                """,
-                (delta, port, rule_id, tag, self.source, bucket),
-            )
-            if not tx.rowcount:
-                tx.execute(
-                    """
-                    INSERT INTO tag_time_stats (port, rule_id, tag, source, time, count)
-                    VALUES (%s, %s, %s, %s, %s, %s)
-                    """,
-                    (port, rule_id, tag, self.source, bucket, delta),
-                )
+        rows = [(*key, delta) for key, delta in deltas.items() if delta != 0]
+        if not rows:
+            return
+        ports, rule_ids, tags, buckets, counts = (list(column) for column in zip(*rows, strict=True))
+        tx.execute(
+            APPLY_TAG_TIME_DELTAS_SQL,
+            (self.source, ports, rule_ids, tags, buckets, counts),
+            prepare=True,
+        )
@@ -3,7 +3,7 @@ from dataclasses import dataclass
 from psycopg import Cursor
 
 
-@dataclass
+@dataclass(slots=True)
 class BackfillJob:
     id: int
     target_id: int
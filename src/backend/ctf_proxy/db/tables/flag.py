@@ -6,8 +6,13 @@ from psycopg import Cursor
 from ctf_proxy.db.connection import nul_safe
 from ctf_proxy.db.refs import Ref
 
+INSERT_SQL = """
+INSERT INTO flag (http_request_id, http_response_id, tcp_connection_id, tcp_event_id, websocket_connection_id, websocket_frame_id, location, "offset", value)
+VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s) RETURNING id
+"""
 
-@dataclass
+
+@dataclass(slots=True)
 class FlagRow:
     id: int
     http_request_id: int | None
@@ -20,7 +25,7 @@ class FlagRow:
     offset: int | None
     value: str
 
-    @dataclass
+    @dataclass(slots=True)
     class Insert:
         TABLE: ClassVar[str] = "flag"
         value: str
@@ -38,10 +43,7 @@ class FlagTable:
     def insert(self, tx: Cursor, **kwargs) -> int:
         row = FlagRow.Insert(**kwargs)
         tx.execute(
-            """
-            INSERT INTO flag (http_request_id, http_response_id, tcp_connection_id, tcp_event_id, websocket_connection_id, websocket_frame_id, location, "offset", value)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s) RETURNING id
-            """,
+            INSERT_SQL,
             (
                 row.http_request_id,
                 row.http_response_id,
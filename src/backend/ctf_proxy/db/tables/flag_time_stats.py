@@ -4,8 +4,17 @@ from psycopg import Cursor
 
 from ctf_proxy.db.base import RowStatus
 
+INCREMENT_SQL = """
+INSERT INTO flag_time_stats (port, time, write_count, read_count)
+VALUES (%s, %s, %s, %s)
+ON CONFLICT (port, time) DO UPDATE SET
+    write_count = flag_time_stats.write_count + EXCLUDED.write_count,
+    read_count = flag_time_stats.read_count + EXCLUDED.read_count
+RETURNING (xmax = 0)
+"""
 
-@dataclass
+
+@dataclass(slots=True)
 class FlagTimeStatsRow:
     id: int
     port: int
@@ -13,14 +22,14 @@ class FlagTimeStatsRow:
     write_count: int
     read_count: int
 
-    @dataclass
+    @dataclass(slots=True)
     class Insert:
         port: int
         time: int
         write_count: int
         read_count: int
 
-    @dataclass
+    @dataclass(slots=True)
     class Increment:
         port: int
         time: int
@@ -40,30 +49,14 @@ class FlagTimeStatsTable:
         return tx.fetchone()[0]
 
     def increment(self, tx: Cursor, increments: FlagTimeStatsRow.Increment) -> RowStatus:
-        sql = """
-          UPDATE flag_time_stats SET
-              write_count = write_count + %s,
-              read_count = read_count + %s
-          WHERE port = %s AND time = %s;
-        """
-        params = (
-            increments.write_count,
-            increments.read_count,
-            increments.port,
-            increments.time,
+        tx.execute(
+            INCREMENT_SQL,
+            (
+                increments.port,
+                increments.time,
+                increments.write_count,
+                increments.read_count,
+            ),
+            prepare=True,
         )
-        tx.execute(sql, params)
-
-        if not tx.rowcount:
-            self.insert(
-                tx,
-                FlagTimeStatsRow.Insert(
-                    port=increments.port,
-                    time=increments.time,
-                    write_count=increments.write_count,
-                    read_count=increments.read_count,
-                ),
-            )
-            return RowStatus.NEW
-
-        return RowStatus.UPDATED
+        return RowStatus.NEW if tx.fetchone()[0] else RowStatus.UPDATED
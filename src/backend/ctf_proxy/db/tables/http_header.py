@@ -8,7 +8,7 @@ from ctf_proxy.db.connection import Row, nul_safe
 from ctf_proxy.db.refs import Ref
 
 
-@dataclass
+@dataclass(slots=True)
 class HttpHeaderRow:
     id: int
     name: str
@@ -16,7 +16,7 @@ class HttpHeaderRow:
     request_id: int | None = None
     response_id: int | None = None
 
-    @dataclass
+    @dataclass(slots=True)
     class Insert:
         TABLE: ClassVar[str] = "http_header"
         name: str
@@ -9,18 +9,26 @@ from ctf_proxy.db.base import (
     TimeStatsRow,
 )
 
+INCREMENT_SQL = """
+INSERT INTO http_header_time_stats (port, name, value, time, count)
+VALUES (%s, %s, %s, %s, %s)
+ON CONFLICT (port, name, value, time) DO UPDATE SET
+    count = http_header_time_stats.count + EXCLUDED.count
+RETURNING (xmax = 0)
+"""
 
-@dataclass
+
+@dataclass(slots=True)
 class HttpHeaderTimeStatsRow(TimeStatsRow):
     name: str
     value: str
 
-    @dataclass
+    @dataclass(slots=True)
     class Insert(TimeStatsInsertRow):
         name: str
         value: str
 
-    @dataclass
+    @dataclass(slots=True)
     class Increment(TimeStatsIncrementRow):
         name: str
         value: str
@@ -37,34 +45,16 @@ class HttpHeaderTimeStatsTable:
         )
         return tx.fetchone()[0]
 
-    def increment(
-        self, tx: Cursor, increments: HttpHeaderTimeStatsRow.Increment
-    ) -> RowStatus:
-        sql = """
-          UPDATE http_header_time_stats SET
-              count = count + %s
-          WHERE port = %s AND name = %s AND value = %s AND time = %s;
-        """
-        params = (
-            increments.count,
-            increments.port,
-            increments.name,
-            increments.value,
-            increments.time,
+    def increment(self, tx: Cursor, increments: HttpHeaderTimeStatsRow.Increment) -> RowStatus:
+        tx.execute(
+            INCREMENT_SQL,
+            (
+                increments.port,
+                increments.name,
+                increments.value,
+                increments.time,
+                increments.count,
+            ),
+            prepare=True,
         )
-        tx.execute(sql, params)
-
-        if not tx.rowcount:
-            self.insert(
-                tx,
-                HttpHeaderTimeStatsRow.Insert(
-                    port=increments.port,
-                    name=increments.name,
-                    value=increments.value,
-                    time=increments.time,
-                    count=increments.count,
-                ),
-            )
-            return RowStatus.NEW
-
-        return RowStatus.UPDATED
+        return RowStatus.NEW if tx.fetchone()[0] else RowStatus.UPDATED
@@ -2,23 +2,36 @@ from dataclasses import dataclass
 
 from psycopg import Cursor
 
-from ctf_proxy.db.base import RowStatus
+from ctf_proxy.db.connection import nul_safe
 
+ENSURE_PATHS_SQL = """
+    INSERT INTO path_dim (path) SELECT unnest(%s::text[])
+    ON CONFLICT (path) DO NOTHING
+"""
 
-@dataclass
+INCREMENT_MANY_SQL = """
+    INSERT INTO http_path_stats (port, path_id, count)
+    SELECT v.port, d.id, v.count
+    FROM unnest(%s::bigint[], %s::text[], %s::bigint[]) AS v(port, path, count)
+    JOIN path_dim d ON d.path = v.path
+    ON CONFLICT (port, path_id) DO UPDATE SET count = http_path_stats.count + EXCLUDED.count
+"""
+
+
+@dataclass(slots=True)
 class HttpPathStatsRow:
     id: int
     port: int
-    path: str
+    path_id: int
     count: int
 
-    @dataclass
+    @dataclass(slots=True)
     class Insert:
         port: int
         path: str
         count: int = 0
 
-    @dataclass
+    @dataclass(slots=True)
     class Increment:
         port: int
         path: str
@@ -26,25 +39,26 @@ class HttpPathStatsRow:
 
 
 class HttpPathStatsTable:
+    def ensure_paths(self, tx: Cursor, paths: list[str]) -> None:
+        tx.execute(ENSURE_PATHS_SQL, (paths,))
+
     def insert(self, tx: Cursor, row: HttpPathStatsRow.Insert) -> int:
+        path = nul_safe(row.path)
+        self.ensure_paths(tx, [path])
         tx.execute(
             """
-            INSERT INTO http_path_stats (port, path, count)
-            VALUES (%s, %s, %s) RETURNING id
+            INSERT INTO http_path_stats (port, path_id, count)
+            SELECT %s, id, %s FROM path_dim WHERE path = %s
+            RETURNING id
             """,
-            (row.port, row.path, row.count),
+            (row.port, row.count, path),
         )
         return tx.fetchone()[0]
 
-    def increment(self, tx: Cursor, increments: HttpPathStatsRow.Increment) -> RowStatus:
-        tx.execute(
-            """
-            INSERT INTO http_path_stats (port, path, count)
-            VALUES (%s, %s, %s)
-            ON CONFLICT (port, path) DO UPDATE SET count = http_path_stats.count + EXCLUDED.count
-            RETURNING (xmax = 0) AS inserted
-            """,
-            (increments.port, increments.path, increments.count),
-        )
-        inserted = tx.fetchone()[0]
-        return RowStatus.NEW if inserted else RowStatus.UPDATED
+    def increment_many(self, tx: Cursor, counts: dict[tuple[int, str], int]) -> None:
+        if not counts:
+            return
+        ports = [port for port, _ in counts]
+        paths = [nul_safe(path) for _, path in counts]
+        self.ensure_paths(tx, paths)
+        tx.execute(INCREMENT_MANY_SQL, (ports, paths, list(counts.values())))
@@ -9,18 +9,26 @@ from ctf_proxy.db.base import (
     TimeStatsRow,
 )
 
+INCREMENT_SQL = """
+INSERT INTO http_path_time_stats (port, method, path, time, count)
+VALUES (%s, %s, %s, %s, %s)
+ON CONFLICT (port, method, path, time) DO UPDATE SET
+    count = http_path_time_stats.count + EXCLUDED.count
+RETURNING (xmax = 0)
+"""
 
-@dataclass
+
+@dataclass(slots=True)
 class HttpPathTimeStatsRow(TimeStatsRow):
     method: str
     path: str
 
-    @dataclass
+    @dataclass(slots=True)
     class Insert(TimeStatsInsertRow):
         method: str
         path: str
 
-    @dataclass
+    @dataclass(slots=True)
     class Increment(TimeStatsIncrementRow):
         method: str
         path: str
@@ -37,34 +45,16 @@ class HttpPathTimeStatsTable:
         )
         return tx.fetchone()[0]
 
-    def increment(
-        self, tx: Cursor, increments: HttpPathTimeStatsRow.Increment
-    ) -> RowStatus:
-        sql = """
-          UPDATE http_path_time_stats SET
-              count = count + %s
-          WHERE port = %s AND method = %s AND path = %s AND time = %s;
-        """
-        params = (
-            increments.count,
-            increments.port,
-            increments.method,
-            increments.path,
-            increments.time,
+    def increment(self, tx: Cursor, increments: HttpPathTimeStatsRow.Increment) -> RowStatus:
+        tx.execute(
+            INCREMENT_SQL,
+            (
+                increments.port,
+                increments.method,
+                increments.path,
+                increments.time,
+                increments.count,
+            ),
+            prepare=True,
         )
-        tx.execute(sql, params)
-
-        if not tx.rowcount:
-            self.insert(
-                tx,
-                HttpPathTimeStatsRow.Insert(
-                    port=increments.port,
-                    method=increments.method,
-                    path=increments.path,
-                    time=increments.time,
-                    count=increments.count,
-                ),
-            )
-            return RowStatus.NEW
-
-        return RowStatus.UPDATED
+        return RowStatus.NEW if tx.fetchone()[0] else RowStatus.UPDATED
@@ -9,18 +9,26 @@ from ctf_proxy.db.base import (
     TimeStatsRow,
 )
 
+INCREMENT_SQL = """
+INSERT INTO http_query_param_time_stats (port, param, value, time, count)
+VALUES (%s, %s, %s, %s, %s)
+ON CONFLICT (port, param, value, time) DO UPDATE SET
+    count = http_query_param_time_stats.count + EXCLUDED.count
+RETURNING (xmax = 0)
+"""
 
-@dataclass
+
+@dataclass(slots=True)
 class HttpQueryParamTimeStatsRow(TimeStatsRow):
     param: str
     value: str
 
-    @dataclass
+    @dataclass(slots=True)
     class Insert(TimeStatsInsertRow):
         param: str
         value: str
 
-    @dataclass
+    @dataclass(slots=True)
     class Increment(TimeStatsIncrementRow):
         param: str
         value: str
@@ -37,34 +45,16 @@ class HttpQueryParamTimeStatsTable:
         )
         return tx.fetchone()[0]
 
-    def increment(
-        self, tx: Cursor, increments: HttpQueryParamTimeStatsRow.Increment
-    ) -> RowStatus:
-        sql = """
-          UPDATE http_query_param_time_stats SET
-              count = count + %s
-          WHERE port = %s AND param = %s AND value = %s AND time = %s;
-        """
-        params = (
-            increments.count,
-            increments.port,
-            increments.param,
-            increments.value,
-            increments.time,
+    def increment(self, tx: Cursor, increments: HttpQueryParamTimeStatsRow.Increment) -> RowStatus:
+        tx.execute(
+            INCREMENT_SQL,
+            (
+                increments.port,
+                increments.param,
+                increments.value,
+                increments.time,
+                increments.count,
+            ),
+            prepare=True,
         )
-        tx.execute(sql, params)
-
-        if not tx.rowcount:
-            self.insert(
-                tx,
-                HttpQueryParamTimeStatsRow.Insert(
-                    port=increments.port,
-                    param=increments.param,
-                    value=increments.value,
-                    time=increments.time,
-                    count=increments.count,
-                ),
-            )
-            return RowStatus.NEW
-
-        return RowStatus.UPDATED
+        return RowStatus.NEW if tx.fetchone()[0] else RowStatus.UPDATED
@@ -1,18 +1,29 @@
 
 from dataclasses import dataclass
-from datetime import datetime
 from typing import ClassVar
 
 from psycopg import Cursor
 
 from ctf_proxy.db.connection import Row, nul_safe
 
+INSERT_SQL = """
+INSERT INTO http_request (port, start_time, path, method, user_agent, body, is_blocked, is_websocket, tap_id, batch_id, request_headers)
+VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s) RETURNING id
+"""
 
-@dataclass
+READ_COLUMNS = (
+    "id, port, start_time, method, path, user_agent, body, "
+    "is_blocked, is_websocket, batch_id, request_headers"
+)
+
+READ_AFTER_SQL = f"SELECT {READ_COLUMNS} FROM http_request WHERE id > %s ORDER BY id LIMIT %s"
+
+
+@dataclass(slots=True)
 class HttpRequestRow:
     id: int
     port: int
-    start_time: datetime
+    start_time: int
     path: str
     method: str
     user_agent: str | None
@@ -23,7 +34,7 @@ class HttpRequestRow:
     batch_id: str | None
     request_headers: str | None
 
-    @dataclass
+    @dataclass(slots=True)
     class Insert:
         TABLE: ClassVar[str] = "http_request"
         RETURNING: ClassVar[bool] = True
@@ -57,10 +68,7 @@ class HttpRequestTable:
         request_headers: str | None = None,
     ) -> int:
         tx.execute(
-            """
-            INSERT INTO http_request (port, start_time, path, method, user_agent, body, is_blocked, is_websocket, tap_id, batch_id, request_headers)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s) RETURNING id
-            """,
+            INSERT_SQL,
             (
                 port,
                 start_time,
@@ -74,12 +82,13 @@ class HttpRequestTable:
                 batch_id,
                 nul_safe(request_headers),
             ),
+            prepare=True,
         )
         return tx.fetchone()[0]
 
     def read_after(self, tx: Cursor, last_id: int, limit: int) -> list[Row]:
         return tx.execute(
-            "SELECT * FROM http_request WHERE id > %s ORDER BY id LIMIT %s",
+            READ_AFTER_SQL,
             (last_id, limit),
         ).fetchall()
 
@@ -99,13 +108,14 @@ class HttpRequestTable:
             params.extend(ports)
         params.append(limit)
         return tx.execute(
-            f"SELECT * FROM http_request WHERE id > %s AND id <= %s{port_clause} ORDER BY id LIMIT %s",
+            f"SELECT {READ_COLUMNS} FROM http_request "
+            f"WHERE id > %s AND id <= %s{port_clause} ORDER BY id LIMIT %s",
             params,
         ).fetchall()
 
     def read_by_ids(self, tx: Cursor, ids: list[int]) -> list[Row]:
         placeholders = ",".join(["%s"] * len(ids))
         return tx.execute(
-            f"SELECT * FROM http_request WHERE id IN ({placeholders}) ORDER BY id",
+            f"SELECT {READ_COLUMNS} FROM http_request WHERE id IN ({placeholders}) ORDER BY id",
             ids,
         ).fetchall()
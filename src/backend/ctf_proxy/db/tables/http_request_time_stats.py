@@ -9,16 +9,25 @@ from ctf_proxy.db.base import (
     TimeStatsRow,
 )
 
+INCREMENT_SQL = """
+INSERT INTO http_request_time_stats (port, time, count, blocked_count)
+VALUES (%s, %s, %s, %s)
+ON CONFLICT (port, time) DO UPDATE SET
+    count = http_request_time_stats.count + EXCLUDED.count,
+    blocked_count = http_request_time_stats.blocked_count + EXCLUDED.blocked_count
+RETURNING (xmax = 0)
+"""
 
-@dataclass
+
+@dataclass(slots=True)
 class HttpRequestTimeStatsRow(TimeStatsRow):
     blocked_count: int
 
-    @dataclass
+    @dataclass(slots=True)
     class Insert(TimeStatsInsertRow):
         blocked_count: int
 
-    @dataclass
+    @dataclass(slots=True)
     class Increment(TimeStatsIncrementRow):
         blocked_count: int
 
@@ -34,33 +43,15 @@ class HttpRequestTimeStatsTable:
         )
         return tx.fetchone()[0]
 
-    def increment(
-        self, tx: Cursor, increments: HttpRequestTimeStatsRow.Increment
-    ) -> RowStatus:
-        sql = """
-          UPDATE http_request_time_stats SET
-              count = count + %s,
-              blocked_count = blocked_count + %s
-          WHERE port = %s AND time = %s;
-        """
-        params = (
-            increments.count,
-            increments.blocked_count,
-            increments.port,
-            increments.time,
+    def increment(self, tx: Cursor, increments: HttpRequestTimeStatsRow.Increment) -> RowStatus:
+        tx.execute(
+            INCREMENT_SQL,
+            (
+                increments.port,
+                increments.time,
+                increments.count,
+                increments.blocked_count,
+            ),
+            prepare=True,
         )
-        tx.execute(sql, params)
-
-        if not tx.rowcount:
-            self.insert(
-                tx,
-                HttpRequestTimeStatsRow.Insert(
-                    port=increments.port,
-                    time=increments.time,
-                    count=increments.count,
-                    blocked_count=increments.blocked_count,
-                ),
-            )
-            return RowStatus.NEW
-
-        return RowStatus.UPDATED
+        return RowStatus.NEW if tx.fetchone()[0] else RowStatus.UPDATED
@@ -7,8 +7,13 @@ from psycopg import Cursor
 from ctf_proxy.db.connection import Row, nul_safe
 from ctf_proxy.db.refs import Ref
 
+INSERT_SQL = """
+INSERT INTO http_response (request_id, status, body, response_headers)
+VALUES (%s, %s, %s, %s) RETURNING id
+"""
 
-@dataclass
+
+@dataclass(slots=True)
 class HttpResponseRow:
     id: int
     request_id: int
@@ -16,7 +21,7 @@ class HttpResponseRow:
     body: str | None
     response_headers: str | None
 
-    @dataclass
+    @dataclass(slots=True)
     class Insert:
         TABLE: ClassVar[str] = "http_response"
         RETURNING: ClassVar[bool] = True
@@ -36,11 +41,9 @@ class HttpResponseTable:
         response_headers: str | None = None,
     ) -> int:
         tx.execute(
-            """
-            INSERT INTO http_response (request_id, status, body, response_headers)
-            VALUES (%s, %s, %s, %s) RETURNING id
-            """,
+            INSERT_SQL,
             (request_id, status, nul_safe(body), nul_safe(response_headers)),
+            prepare=True,
         )
         return tx.fetchone()[0]
 
@@ -49,6 +52,7 @@ class HttpResponseTable:
     ) -> list[Row]:
         placeholders = ",".join(["%s"] * len(request_ids))
         return tx.execute(
-            f"SELECT * FROM http_response WHERE request_id IN ({placeholders})",
+            "SELECT request_id, id, status, body, response_headers "
+            f"FROM http_response WHERE request_id IN ({placeholders})",
             request_ids,
         ).fetchall()
@@ -2,21 +2,32 @@ from dataclasses import dataclass
 
 from psycopg import Cursor
 
+GET_BY_PORTS_SQL = (
+    "SELECT id, port, status_code, count FROM http_response_code_stats WHERE port = ANY(%s)"
+)
+
+INCREMENT_SQL = """
+INSERT INTO http_response_code_stats (port, status_code, count)
+VALUES (%s, %s, %s)
+ON CONFLICT (port, status_code)
+DO UPDATE SET count = http_response_code_stats.count + EXCLUDED.count
+"""
+
 
-@dataclass
+@dataclass(slots=True)
 class HttpResponseCodeStatsRow:
     id: int
     port: int
     status_code: int
     count: int
 
-    @dataclass
+    @dataclass(slots=True)
     class Insert:
         port: int
         status_code: int
         count: int = 0
 
-    @dataclass
+    @dataclass(slots=True)
     class Increment:
         port: int
         status_code: int
@@ -35,36 +46,15 @@ class HttpResponseCodeStatsTable:
         return tx.fetchone()[0]
 
     def increment(self, tx: Cursor, increments: HttpResponseCodeStatsRow.Increment) -> None:
-        sql = """
-UPDATE http_response_code_stats SET
-    count = count + %s
-WHERE port = %s AND status_code = %s;
-"""
-        params = (
-            increments.count,
-            increments.port,
-            increments.status_code,
+        tx.execute(
+            INCREMENT_SQL,
+            (increments.port, increments.status_code, increments.count),
         )
-        tx.execute(sql, params)
-        if not tx.rowcount:
-            self.insert(
-                tx,
-                HttpResponseCodeStatsRow.Insert(
-                    port=increments.port, status_code=increments.status_code, count=increments.count
-                ),
-            )
 
     def get_by_ports(self, tx: Cursor, ports: list[int]) -> list[HttpResponseCodeStatsRow]:
         if not ports:
             return []
 
-        placeholders = ",".join("%s" for _ in ports)
-        fields = [
-            "port",
-            "status_code",
-            "count",
-        ]
-        sql = f"SELECT {', '.join(fields)} FROM http_response_code_stats WHERE port IN ({placeholders})"
-        tx.execute(sql, ports)
+        tx.execute(GET_BY_PORTS_SQL, (ports,))
         rows = tx.fetchall()
-        return [HttpResponseCodeStatsRow(**dict(zip(fields, row, strict=False))) for row in rows]
+        return [HttpResponseCodeStatsRow(*row) for row in rows]
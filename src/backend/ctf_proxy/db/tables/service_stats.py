@@ -2,8 +2,36 @@ from dataclasses import dataclass
 
 from psycopg import Cursor
 
+SELECT_COLUMNS = (
+    "id, port, total_requests, total_blocked_requests, total_responses, "
+    "total_blocked_responses, total_flags_written, total_flags_retrieved, total_flags_blocked, "
+    "total_websocket_connections, total_websocket_frames"
+)
 
-@dataclass
+GET_BY_PORTS_SQL = f"SELECT {SELECT_COLUMNS} FROM service_stats WHERE port = ANY(%s)"
+
+INCREMENT_SQL = """
+INSERT INTO service_stats (
+    port, total_requests, total_blocked_requests, total_responses, total_blocked_responses,
+    total_flags_written, total_flags_retrieved, total_flags_blocked,
+    total_websocket_connections, total_websocket_frames
+) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+ON CONFLICT (port) DO UPDATE SET
+    total_requests = service_stats.total_requests + EXCLUDED.total_requests,
+    total_blocked_requests = service_stats.total_blocked_requests + EXCLUDED.total_blocked_requests,
+    total_responses = service_stats.total_responses + EXCLUDED.total_responses,
+    total_blocked_responses =
+        service_stats.total_blocked_responses + EXCLUDED.total_blocked_responses,
+    total_flags_written = service_stats.total_flags_written + EXCLUDED.total_flags_written,
+    total_flags_retrieved = service_stats.total_flags_retrieved + EXCLUDED.total_flags_retrieved,
+    total_flags_blocked = service_stats.total_flags_blocked + EXCLUDED.total_flags_blocked,
+    total_websocket_connections =
+        service_stats.total_websocket_connections + EXCLUDED.total_websocket_connections,
+    total_websocket_frames = service_stats.total_websocket_frames + EXCLUDED.total_websocket_frames
+"""
+
+
+@dataclass(slots=True)
 class ServiceStatsRow:
     id: int
     port: int
@@ -17,11 +45,11 @@ class ServiceStatsRow:
     total_websocket_connections: int
     total_websocket_frames: int
 
-    @dataclass
+    @dataclass(slots=True)
     class Insert:
         port: int
 
-    @dataclass
+    @dataclass(slots=True)
     class Increment:
         port: int
         total_requests: int = 0
@@ -50,55 +78,26 @@ class ServiceStatsTable:
         return tx.fetchone()[0]
 
     def increment(self, tx: Cursor, increments: ServiceStatsRow.Increment) -> None:
-        sql = """
-UPDATE service_stats SET
-    total_requests = total_requests + %s,
-    total_blocked_requests = total_blocked_requests + %s,
-    total_responses = total_responses + %s,
-    total_blocked_responses = total_blocked_responses + %s,
-    total_flags_written = total_flags_written + %s,
-    total_flags_retrieved = total_flags_retrieved + %s,
-    total_flags_blocked = total_flags_blocked + %s,
-    total_websocket_connections = total_websocket_connections + %s,
-    total_websocket_frames = total_websocket_frames + %s
-WHERE port = %s;
-"""
-        params = (
-            increments.total_requests,
-            increments.total_blocked_requests,
-            increments.total_responses,
-            increments.total_blocked_responses,
-            increments.total_flags_written,
-            increments.total_flags_retrieved,
-            increments.total_flags_blocked,
-            increments.total_websocket_connections,
-            increments.total_websocket_frames,
-            increments.port,
+        tx.execute(
+            INCREMENT_SQL,
+            (
+                increments.port,
+                increments.total_requests,
+                increments.total_blocked_requests,
+                increments.total_responses,
+                increments.total_blocked_responses,
+                increments.total_flags_written,
+                increments.total_flags_retrieved,
+                increments.total_flags_blocked,
+                increments.total_websocket_connections,
+                increments.total_websocket_frames,
+            ),
         )
-        tx.execute(sql, params)
-        if not tx.rowcount:
-            self.insert(tx, ServiceStatsRow.Insert(port=increments.port))
-            tx.execute(sql, params)
-            assert tx.rowcount, "Failed to increment service stats after insert"
 
     def get_by_ports(self, tx: Cursor, ports: list[int]) -> list[ServiceStatsRow]:
         if not ports:
             return []
 
-        placeholders = ",".join("%s" for _ in ports)
-        fields = [
-            "port",
-            "total_requests",
-            "total_blocked_requests",
-            "total_responses",
-            "total_blocked_responses",
-            "total_flags_written",
-            "total_flags_retrieved",
-            "total_flags_blocked",
-            "total_websocket_connections",
-            "total_websocket_frames",
-        ]
-        sql = f"SELECT {', '.join(fields)} FROM service_stats WHERE port IN ({placeholders})"
-        tx.execute(sql, ports)
+        tx.execute(GET_BY_PORTS_SQL, (ports,))
         rows = tx.fetchall()
-        return [ServiceStatsRow(**dict(zip(fields, row, strict=False))) for row in rows]
+        return [ServiceStatsRow(*row) for row in rows]
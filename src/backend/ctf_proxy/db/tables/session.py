@@ -4,13 +4,13 @@ from typing import ClassVar
 from psycopg import Cursor
 
 
-@dataclass
+@dataclass(slots=True)
 class SessionRow:
     id: int
     port: int
     key: str
 
-    @dataclass
+    @dataclass(slots=True)
     class Insert:
         TABLE: ClassVar[str] = "session"
         RETURNING: ClassVar[bool] = True
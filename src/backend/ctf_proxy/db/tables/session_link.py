@@ -6,13 +6,13 @@ from psycopg import Cursor
 from ctf_proxy.db.refs import Ref
 
 
-@dataclass
+@dataclass(slots=True)
 class SessionLinkRow:
     id: int
     session_id: int
     http_request_id: int
 
-    @dataclass
+    @dataclass(slots=True)
     class Insert:
         TABLE: ClassVar[str] = "session_link"
         CONFLICT: ClassVar[str] = "ON CONFLICT (session_id, http_request_id) DO NOTHING"
@@ -1,12 +1,26 @@
 
 from dataclasses import dataclass
+from typing import ClassVar
 
 from psycopg import Cursor
 
 from ctf_proxy.db.connection import Row
 
+INSERT_SQL = """
+INSERT INTO tcp_connection (
+    port, connection_id, start_time, duration_ms,
+    bytes_in, bytes_out, is_blocked, tap_id, batch_id
+) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s) RETURNING id
+"""
 
-@dataclass
+READ_COLUMNS = (
+    "id, port, connection_id, start_time, duration_ms, bytes_in, bytes_out, is_blocked, batch_id"
+)
+
+READ_AFTER_SQL = f"SELECT {READ_COLUMNS} FROM tcp_connection WHERE id > %s ORDER BY id LIMIT %s"
+
+
+@dataclass(slots=True)
 class TcpConnectionRow:
     id: int
     port: int
@@ -19,38 +33,26 @@ class TcpConnectionRow:
     tap_id: str | None
     batch_id: str | None
 
-    @dataclass
+    @dataclass(slots=True)
     class Insert:
+        TABLE: ClassVar[str] = "tcp_connection"
+        RETURNING: ClassVar[bool] = True
         port: int
         connection_id: int
         start_time: int
         duration_ms: int
         bytes_in: int
         bytes_out: int
-        is_blocked: bool = 0
+        is_blocked: int = 0
         tap_id: str | None = None
         batch_id: str | None = None
 
 
 class TcpConnectionTable:
     def insert(self, tx: Cursor, **kwargs) -> int:
-        row = (
-            TcpConnectionRow.Insert(**kwargs)
-            if not isinstance(kwargs.get("port"), TcpConnectionRow.Insert)
-            else kwargs["port"]
-        )
-        if isinstance(kwargs.get("port"), TcpConnectionRow.Insert):
-            row = kwargs["port"]
-        else:
-            row = TcpConnectionRow.Insert(**kwargs)
-
+        row = TcpConnectionRow.Insert(**kwargs)
         tx.execute(
-            """
-            INSERT INTO tcp_connection (
-                port, connection_id, start_time, duration_ms,
-                bytes_in, bytes_out, is_blocked, tap_id, batch_id
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s) RETURNING id
-            """,
+            INSERT_SQL,
             (
                 row.port,
                 row.connection_id,
@@ -62,12 +64,13 @@ class TcpConnectionTable:
                 row.tap_id,
                 row.batch_id,
             ),
+            prepare=True,
         )
         return tx.fetchone()[0]
 
     def read_after(self, tx: Cursor, last_id: int, limit: int) -> list[Row]:
         return tx.execute(
-            "SELECT * FROM tcp_connection WHERE id > %s ORDER BY id LIMIT %s",
+            READ_AFTER_SQL,
             (last_id, limit),
         ).fetchall()
 
@@ -87,13 +90,14 @@ class TcpConnectionTable:
             params.extend(ports)
         params.append(limit)
         return tx.execute(
-            f"SELECT * FROM tcp_connection WHERE id > %s AND id <= %s{port_clause} ORDER BY id LIMIT %s",
+            f"SELECT {READ_COLUMNS} FROM tcp_connection "
+            f"WHERE id > %s AND id <= %s{port_clause} ORDER BY id LIMIT %s",
             params,
         ).fetchall()
 
     def read_by_ids(self, tx: Cursor, ids: list[int]) -> list[Row]:
         placeholders = ",".join(["%s"] * len(ids))
         return tx.execute(
-            f"SELECT * FROM tcp_connection WHERE id IN ({placeholders}) ORDER BY id",
+            f"SELECT {READ_COLUMNS} FROM tcp_connection WHERE id IN ({placeholders}) ORDER BY id",
             ids,
         ).fetchall()
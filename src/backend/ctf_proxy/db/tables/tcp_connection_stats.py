@@ -5,7 +5,7 @@ from psycopg import Cursor
 from ctf_proxy.db.base import RowStatus
 
 
-@dataclass
+@dataclass(slots=True)
 class TcpConnectionStatsRow:
     id: int
     port: int
@@ -15,7 +15,7 @@ class TcpConnectionStatsRow:
     write_max: int
     count: int
 
-    @dataclass
+    @dataclass(slots=True)
     class Insert:
         port: int
         read_min: int
@@ -24,7 +24,7 @@ class TcpConnectionStatsRow:
         write_max: int
         count: int = 1
 
-    @dataclass
+    @dataclass(slots=True)
     class Increment:
         port: int
         read_min: int
@@ -36,25 +36,14 @@ class TcpConnectionStatsRow:
 
 class TcpConnectionStatsTable:
     def increment(self, tx: Cursor, row: TcpConnectionStatsRow.Increment) -> RowStatus:
-        # Try to update existing record
         tx.execute(
             """
-            UPDATE tcp_connection_stats
-            SET count = count + %s
-            WHERE port = %s AND read_min = %s AND read_max = %s AND write_min = %s AND write_max = %s
-        """,
-            (row.count, row.port, row.read_min, row.read_max, row.write_min, row.write_max),
-        )
-
-        if tx.rowcount == 0:
-            # Insert new record if not exists
-            tx.execute(
-                """
-                INSERT INTO tcp_connection_stats (port, read_min, read_max, write_min, write_max, count)
-                VALUES (%s, %s, %s, %s, %s, %s)
+            INSERT INTO tcp_connection_stats (port, read_min, read_max, write_min, write_max, count)
+            VALUES (%s, %s, %s, %s, %s, %s)
+            ON CONFLICT (port, read_min, read_max, write_min, write_max)
+            DO UPDATE SET count = tcp_connection_stats.count + EXCLUDED.count
+            RETURNING (xmax = 0) AS inserted
             """,
-                (row.port, row.read_min, row.read_max, row.write_min, row.write_max, row.count),
-            )
-            return RowStatus.NEW
-
-        return RowStatus.UPDATED
+            (row.port, row.read_min, row.read_max, row.write_min, row.write_max, row.count),
+        )
+        return RowStatus.NEW if tx.fetchone()[0] else RowStatus.UPDATED
@@ -1,11 +1,30 @@
+from collections.abc import Iterator
 from dataclasses import dataclass
+from typing import ClassVar
 
-from psycopg import Cursor
+from psycopg import Connection, Cursor
 
 from ctf_proxy.db.connection import Row, nul_safe
+from ctf_proxy.db.refs import Ref
 
+STREAM_CHUNK_SIZE = 64
 
-@dataclass
+INSERT_SQL = """
+INSERT INTO tcp_event (
+    connection_id, timestamp, event_type, data, data_text,
+    data_size, end_stream, truncated
+) VALUES (%s, %s, %s, %s, %s, %s, %s, %s) RETURNING id
+"""
+
+INSERT_MANY_SQL = """
+INSERT INTO tcp_event (
+    connection_id, timestamp, event_type, data, data_text,
+    data_size, end_stream, truncated
+) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+
+@dataclass(slots=True)
 class TcpEventRow:
     id: int
     connection_id: int
@@ -17,16 +36,17 @@ class TcpEventRow:
     end_stream: int
     truncated: int
 
-    @dataclass
+    @dataclass(slots=True)
     class Insert:
-        connection_id: int
+        TABLE: ClassVar[str] = "tcp_event"
+        connection_id: "int | Ref"
         timestamp: int
         event_type: str
         data: bytes | None = None
         data_text: str | None = None
         data_size: int = 0
-        end_stream: bool = False
-        truncated: bool = False
+        end_stream: int = 0
+        truncated: int = 0
 
 
 class TcpEventTable:
@@ -34,12 +54,7 @@ class TcpEventTable:
         row = TcpEventRow.Insert(**kwargs)
 
         tx.execute(
-            """
-            INSERT INTO tcp_event (
-                connection_id, timestamp, event_type, data, data_text,
-                data_size, end_stream, truncated
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s) RETURNING id
-            """,
+            INSERT_SQL,
             (
                 row.connection_id,
                 row.timestamp,
@@ -50,6 +65,7 @@ class TcpEventTable:
                 int(row.end_stream),
                 int(row.truncated),
             ),
+            prepare=True,
         )
         return tx.fetchone()[0]
 
@@ -57,13 +73,8 @@ class TcpEventTable:
         if not events:
             return
         tx.executemany(
-            """
-            INSERT INTO tcp_event (
-                connection_id, timestamp, event_type, data, data_text,
-                data_size, end_stream, truncated
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            """,
-            [
+            INSERT_MANY_SQL,
+            (
                 (
                     e.connection_id,
                     e.timestamp,
@@ -75,13 +86,14 @@ class TcpEventTable:
                     int(e.truncated),
                 )
                 for e in events
-            ],
+            ),
         )
 
-    def get_by_connection_ids(self, tx: Cursor, connection_ids: list[int]) -> list[Row]:
+    def iter_by_connection_ids(self, conn: Connection, connection_ids: list[int]) -> Iterator[Row]:
         placeholders = ",".join(["%s"] * len(connection_ids))
-        return tx.execute(
+        yield from conn.cursor().stream(
             "SELECT connection_id, event_type, data_text, data_size, end_stream, truncated "
             f"FROM tcp_event WHERE connection_id IN ({placeholders}) ORDER BY id",
             connection_ids,
-        ).fetchall()
+            size=STREAM_CHUNK_SIZE,
+        )
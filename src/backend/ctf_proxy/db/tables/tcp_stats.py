@@ -20,7 +20,7 @@ class TcpStatsTable:
                 total_connections = tcp_stats.total_connections + 1,
                 total_bytes_in = tcp_stats.total_bytes_in + %s,
                 total_bytes_out = tcp_stats.total_bytes_out + %s,
-                avg_duration_ms = CAST((tcp_stats.avg_duration_ms * (tcp_stats.total_connections - 1) + %s) AS INTEGER) / tcp_stats.total_connections,
+                avg_duration_ms = (tcp_stats.avg_duration_ms * tcp_stats.total_connections + %s) / (tcp_stats.total_connections + 1),
                 total_flags_found = tcp_stats.total_flags_found + %s
         """,
             (
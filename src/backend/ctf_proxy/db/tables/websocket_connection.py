@@ -6,12 +6,12 @@ from psycopg import Cursor
 from ctf_proxy.db.refs import Ref
 
 
-@dataclass
+@dataclass(slots=True)
 class WebSocketConnectionRow:
     id: int
     http_request_id: int
 
-    @dataclass
+    @dataclass(slots=True)
     class Insert:
         TABLE: ClassVar[str] = "websocket_connection"
         RETURNING: ClassVar[bool] = True
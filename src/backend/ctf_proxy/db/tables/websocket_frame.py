@@ -7,7 +7,7 @@ from ctf_proxy.db.connection import nul_safe
 from ctf_proxy.db.refs import Ref
 
 
-@dataclass
+@dataclass(slots=True)
 class WebSocketFrameRow:
     id: int
     connection_id: int
@@ -19,7 +19,7 @@ class WebSocketFrameRow:
     payload_size: int
     masked: bool
 
-    @dataclass
+    @dataclass(slots=True)
     class Insert:
         TABLE: ClassVar[str] = "websocket_frame"
         connection_id: "int | Ref"
@@ -40,7 +40,7 @@ class WebSocketFrameTable:
                 payload_size, is_client
             ) VALUES (%s, %s, %s, %s, %s, %s, %s)
             """,
-            [
+            (
                 (
                     frame.connection_id,
                     frame.ord,
@@ -51,5 +51,5 @@ class WebSocketFrameTable:
                     int(bool(frame.is_client)),
                 )
                 for frame in frames
-            ],
+            ),
         )
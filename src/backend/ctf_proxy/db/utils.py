@@ -1,5 +1,6 @@
 import datetime
 import json
+import time
 
 
 def parse_headers(text: str | None) -> list[tuple[str, str]]:
@@ -9,12 +10,19 @@ def parse_headers(text: str | None) -> list[tuple[str, str]]:
     return [(name, value) for name, value in json.loads(text)]
 
 
+def parse_headers_dict(text: str | None) -> dict[str, str]:
+    """Decode a headers json column straight into a dict; later duplicates win."""
+    if not text:
+        return {}
+    return dict(json.loads(text))
+
+
 def convert_datetime_to_timestamp(dt: datetime.datetime) -> int:
     return int(dt.timestamp() * 1000)
 
 
 def now_timestamp() -> int:
-    return convert_datetime_to_timestamp(datetime.datetime.now())
+    return time.time_ns() // 1_000_000
 
 
 def convert_timestamp_to_datetime(ts: int) -> datetime.datetime:
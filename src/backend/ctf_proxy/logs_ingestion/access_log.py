@@ -1,9 +1,13 @@
 import json
 import logging
+import mmap
+import os
 from dataclasses import dataclass
 
 logger = logging.getLogger(__name__)
 
+POSITION_WIDTH = 20
+
 
 @dataclass
 class AccessLogEntry:
@@ -15,6 +19,8 @@ class AccessLogReader:
     def __init__(self, path: str):
         self.path = path
         self.last_position = self.read_last_processed_position()
+        self.position_fd: int | None = None
+        self.written_position: int | None = None
 
     def read_last_processed_position(self) -> int:
         try:
@@ -25,25 +31,47 @@ class AccessLogReader:
 
     def read_new_entries(self, max_entries=None) -> list[AccessLogEntry]:
         new_entries: list[AccessLogEntry] = []
-        with open(self.path) as f:
-            f.seek(self.last_position)
-            while line := f.readline():
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    log_entry = json.loads(line)
-                except json.JSONDecodeError:
-                    logger.error(f"Failed to parse log line as JSON: {line}")
-                    continue
-
-                self.last_position = f.tell()
-                new_entries.append(AccessLogEntry(data=log_entry, end_position=self.last_position))
-                if max_entries is not None and len(new_entries) >= max_entries:
-                    break
+        with open(self.path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size <= self.last_position:
+                return new_entries
+            base = self.last_position - self.last_position % mmap.ALLOCATIONGRANULARITY
+            with mmap.mmap(f.fileno(), size - base, offset=base, access=mmap.ACCESS_READ) as mm:
+                if hasattr(mmap, "MADV_SEQUENTIAL"):
+                    mm.madvise(mmap.MADV_SEQUENTIAL)
+                start = self.last_position - base
+                while (newline := mm.find(b"\n", start)) != -1:
+                    line = mm[start:newline].strip()
+                    start = newline + 1
+                    if not line:
+                        continue
+                    try:
+                        log_entry = json.loads(line)
+                    except (json.JSONDecodeError, UnicodeDecodeError):
+                        logger.error("Failed to parse log line as JSON: %r", line)
+                        continue
+
+                    self.last_position = base + start
+                    new_entries.append(
+                        AccessLogEntry(data=log_entry, end_position=self.last_position)
+                    )
+                    if max_entries is not None and len(new_entries) >= max_entries:
+                        break
+
+            if base and hasattr(os, "posix_fadvise"):
+                os.posix_fadvise(f.fileno(), 0, base, os.POSIX_FADV_DONTNEED)
 
         return new_entries
 
     def write_last_processed_position(self, position: int) -> None:
-        with open(self.path + ".pos", "w") as f:
-            f.write(str(position))
+        if position == self.written_position:
+            return
+        if self.position_fd is None:
+            self.position_fd = os.open(self.path + ".pos", os.O_WRONLY | os.O_CREAT, 0o644)
+            os.ftruncate(self.position_fd, POSITION_WIDTH)
+        os.pwrite(self.position_fd, f"{position:0{POSITION_WIDTH}d}".encode(), 0)
+        self.written_position = position
+
+    def flush(self) -> None:
+        if self.position_fd is not None:
+            os.fsync(self.position_fd)
@@ -2,18 +2,23 @@ import io
 import json
 import logging
 import os
+import shutil
 import signal
+import subprocess
 import sys
 import tarfile
 import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
-from time import perf_counter
+from time import monotonic, perf_counter
+from typing import BinaryIO
 
 from ctf_proxy.common.config import Config
 from ctf_proxy.db import connection
 from ctf_proxy.db.models import make_db
 
 from .http import HttpProcessor
+from .taps import TapsFolder
 from .tcp import TcpProcessor
 
 DEFAULT_HTTP_TAP_FOLDER = "/app/logs/tap"
@@ -25,6 +30,10 @@ DEFAULT_CONFIG_FILE = "/app/data/config.yml"
 SLEEP_WHEN_NO_FILES = 5
 SLEEP_BETWEEN_BATCHES = 1
 SLEEP_ON_ERROR = 5
+ARCHIVE_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+PIGZ_PATH = shutil.which("pigz")
+ARCHIVE_MAX_ITEMS = 2000
+ARCHIVE_MAX_AGE = 5
 
 logger = logging.getLogger(__name__)
 
@@ -47,6 +56,13 @@ class BatchProcessor:
         self.running = True
         self.shutdown_event = threading.Event()
         self.next_batch_count = 1
+        self.archive_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="archive")
+        self.pending_archive: Future | None = None
+        self.pending_archive_taps: list[tuple[TapsFolder, list[str]]] = []
+        self.archive_buffer: dict[str, dict] = {}
+        self.archive_buffer_taps: list[tuple[TapsFolder, list[str]]] = []
+        self.archive_buffer_id = ""
+        self.archive_buffer_started = 0.0
 
         os.makedirs(self.archive_folder, exist_ok=True)
         self.db = make_db()
@@ -86,29 +102,67 @@ class BatchProcessor:
         self.next_batch_count += 1
         return batch_id
 
+    def current_archive_id(self) -> str:
+        # rows record the id of the tarball their taps end up in
+        if self.archive_buffer:
+            return self.archive_buffer_id
+        return self.create_batch_id()
+
     def process_batch(self):
         total_processed = 0
-        with self.db.connect() as conn:
-            tx = conn.cursor()
-
-            try:
-                batch_id = self.create_batch_id()
-                http_archive = self.http_processor.process_new_access_log_entries(tx, batch_id)
-                total_processed += len(http_archive)
-                self.save_archive(batch_id, http_archive)
-            except Exception as e:
-                logger.error(f"Error processing HTTP entries: {e}")
-
+        for name, processor in (("HTTP", self.http_processor), ("TCP", self.tcp_processor)):
             try:
-                batch_id = self.create_batch_id()
-                tcp_archive = self.tcp_processor.process_new_access_log_entries(tx, batch_id)
-                total_processed += len(tcp_archive)
-                self.save_archive(batch_id, tcp_archive)
+                batch_id = self.current_archive_id()
+                with self.db.writer() as tx:
+                    archive = processor.process_new_access_log_entries(tx, batch_id)
+                processor.commit_progress()
+                total_processed += len(archive)
+                self.archive_in_background(batch_id, archive, processor.taps_folder)
             except Exception as e:
-                logger.error(f"Error processing TCP entries: {e}")
+                logger.error("Error processing %s entries: %s", name, e)
 
         return total_processed
 
+    def archive_in_background(
+        self, batch_id: str, to_archive: dict[str, dict], taps_folder: TapsFolder
+    ) -> None:
+        if not to_archive:
+            return
+        if not self.archive_buffer:
+            self.archive_buffer_id = batch_id
+            self.archive_buffer_started = monotonic()
+        self.archive_buffer.update(to_archive)
+        self.archive_buffer_taps.append((taps_folder, list(to_archive)))
+        if (
+            len(self.archive_buffer) >= ARCHIVE_MAX_ITEMS
+            or monotonic() - self.archive_buffer_started >= ARCHIVE_MAX_AGE
+        ):
+            self.flush_archive_buffer()
+
+    def flush_archive_buffer(self) -> None:
+        if not self.archive_buffer:
+            return
+        self.finish_pending_archive()
+        self.pending_archive = self.archive_executor.submit(
+            self.save_archive, self.archive_buffer_id, self.archive_buffer
+        )
+        self.pending_archive_taps = self.archive_buffer_taps
+        self.archive_buffer = {}
+        self.archive_buffer_taps = []
+
+    def finish_pending_archive(self) -> None:
+        if self.pending_archive is None:
+            return
+        try:
+            self.pending_archive.result()
+        except Exception as e:
+            logger.error("Failed to save archive, keeping its tap files: %s", e)
+        else:
+            for taps_folder, filenames in self.pending_archive_taps:
+                taps_folder.remove(filenames)
+        self.pending_archive = None
+        self.pending_archive_taps = []
+
     def save_archive(self, batch_id: str, to_archive: dict[str, dict]):
         if not to_archive:
             return
@@ -116,19 +170,20 @@ class BatchProcessor:
         archive_path = os.path.join(self.archive_folder, f"{batch_id}.tar.gz")
 
         start = perf_counter()
-        raw_bytes = 0
-        with tarfile.open(archive_path, "w:gz", compresslevel=1) as tar:
-            for name, data in to_archive.items():
-                try:
-                    json_bytes = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode(
-                        "utf-8"
-                    )
-                    raw_bytes += len(json_bytes)
-                    info = tarfile.TarInfo(name)
-                    info.size = len(json_bytes)
-                    tar.addfile(info, io.BytesIO(json_bytes))
-                except Exception as e:
-                    logger.error(f"Failed to archive {name}: {e}")
+        with open(archive_path, "wb") as out:
+            if PIGZ_PATH:
+                raw_bytes = self.write_pigz_archive(out, to_archive)
+            else:
+                with tarfile.open(fileobj=out, mode="w:gz", compresslevel=1) as tar:
+                    raw_bytes = self.add_archive_members(tar, to_archive)
+            # the tap files are deleted once this returns, so the archive must be durable
+            out.flush()
+            os.fsync(out.fileno())
+        dir_fd = os.open(self.archive_folder, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
 
         elapsed_ms = (perf_counter() - start) * 1000
         gz_bytes = os.path.getsize(archive_path) if os.path.exists(archive_path) else 0
@@ -137,16 +192,45 @@ class BatchProcessor:
             archive_path, len(to_archive), raw_bytes / 1e6, gz_bytes / 1e6, elapsed_ms,
         )
 
+    def write_pigz_archive(self, out: BinaryIO, to_archive: dict[str, dict]) -> int:
+        proc = subprocess.Popen([PIGZ_PATH, "-1"], stdin=subprocess.PIPE, stdout=out)
+        try:
+            with tarfile.open(fileobj=proc.stdin, mode="w|") as tar:
+                raw_bytes = self.add_archive_members(tar, to_archive)
+        finally:
+            proc.stdin.close()
+            proc.wait()
+        if proc.returncode:
+            raise subprocess.CalledProcessError(proc.returncode, PIGZ_PATH)
+        return raw_bytes
+
+    def add_archive_members(self, tar: tarfile.TarFile, to_archive: dict[str, dict]) -> int:
+        raw_bytes = 0
+        for name, data in to_archive.items():
+            try:
+                json_bytes = ARCHIVE_ENCODER.encode(data).encode("utf-8")
+                raw_bytes += len(json_bytes)
+                info = tarfile.TarInfo(name)
+                info.size = len(json_bytes)
+                tar.addfile(info, io.BytesIO(json_bytes))
+            except Exception as e:
+                logger.error("Failed to archive %s: %s", name, e)
+        return raw_bytes
+
     def process_taps(self):
         while self.running:
             logger.info("Checking for new log entries...")
             try:
-                start = datetime.now()
+                start = perf_counter()
                 processed_count = self.process_batch()
-                duration = (datetime.now() - start).total_seconds() * 1000
+                duration = (perf_counter() - start) * 1000
 
                 if processed_count > 0:
                     logger.info(f"Processed batch in {duration:.2f} ms")
+                else:
+                    self.flush_archive_buffer()
+                if self.pending_archive is not None and self.pending_archive.done():
+                    self.finish_pending_archive()
 
                 if self.running:
                     if self.wait_or_shutdown(SLEEP_BETWEEN_BATCHES):
@@ -171,6 +255,9 @@ class BatchProcessor:
         except KeyboardInterrupt:
             pass
         finally:
+            self.flush_archive_buffer()
+            self.finish_pending_archive()
+            self.archive_executor.shutdown(wait=True)
             logger.info("Post-processor stopped")
 
 
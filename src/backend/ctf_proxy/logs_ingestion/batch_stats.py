@@ -1,5 +1,7 @@
 from psycopg import Cursor
 
+from ctf_proxy.db.tables.http_path_stats import HttpPathStatsTable
+
 UPSERT_CHUNK_SIZE = 1000
 
 SERVICE_SUM_COLS = [
@@ -15,6 +17,9 @@ SERVICE_SUM_COLS = [
 ]
 
 
+TEXT_KEY_COLS = frozenset({"method", "path", "param", "value", "name"})
+
+
 def bulk_upsert(
     tx: Cursor,
     table: str,
@@ -26,22 +31,53 @@ def bulk_upsert(
         return
 
     cols = key_cols + sum_cols
-    row_placeholder = "(" + ",".join(["%s"] * len(cols)) + ")"
+    arrays = ", ".join("%s::text[]" if c in TEXT_KEY_COLS else "%s::bigint[]" for c in cols)
     set_clause = ", ".join(f"{c} = {table}.{c} + EXCLUDED.{c}" for c in sum_cols)
     conflict = ", ".join(key_cols)
-
+    rows = [(*key, *sums) for key, sums in buffer.items()]
+    columns = [list(column) for column in zip(*rows, strict=True)]
+    tx.execute(
+        f"INSERT INTO {table} ({', '.join(cols)}) SELECT * FROM unnest({arrays}) "
+        f"ON CONFLICT ({conflict}) DO UPDATE SET {set_clause}",
+        columns,
+        prepare=True,
+    )
+
+
+TCP_STATS_UPSERT_SQL = """
+INSERT INTO tcp_stats (
+    port, total_connections, total_bytes_in, total_bytes_out, avg_duration_ms, total_flags_found
+) VALUES {values}
+ON CONFLICT (port) DO UPDATE SET
+    total_connections = tcp_stats.total_connections + EXCLUDED.total_connections,
+    total_bytes_in = tcp_stats.total_bytes_in + EXCLUDED.total_bytes_in,
+    total_bytes_out = tcp_stats.total_bytes_out + EXCLUDED.total_bytes_out,
+    avg_duration_ms = (
+        tcp_stats.avg_duration_ms * tcp_stats.total_connections
+        + EXCLUDED.avg_duration_ms * EXCLUDED.total_connections
+    ) / (tcp_stats.total_connections + EXCLUDED.total_connections),
+    total_flags_found = tcp_stats.total_flags_found + EXCLUDED.total_flags_found
+"""
+
+
+def upsert_tcp_stats(tx: Cursor, buffer: dict[tuple, list[int]]) -> None:
+    """Upsert per-port TCP totals; buffered values are
+    [connections, bytes_in, bytes_out, duration_ms_sum, flags_found]."""
+    if not buffer:
+        return
     rows = list(buffer.items())
     for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
         chunk = rows[start : start + UPSERT_CHUNK_SIZE]
-        values = ", ".join([row_placeholder] * len(chunk))
         params: list = []
-        for key, sums in chunk:
-            params.extend(key)
-            params.extend(sums)
+        for (port,), (connections, bytes_in, bytes_out, duration_sum, flags) in chunk:
+            params.extend(
+                (port, connections, bytes_in, bytes_out, duration_sum // connections, flags)
+            )
+        values = ", ".join(["(%s, %s, %s, %s, %s, %s)"] * len(chunk))
         tx.execute(
-            f"INSERT INTO {table} ({', '.join(cols)}) VALUES {values} "
-            f"ON CONFLICT ({conflict}) DO UPDATE SET {set_clause}",
+            TCP_STATS_UPSERT_SQL.format(values=values),
             params,
+            prepare=len(chunk) == UPSERT_CHUNK_SIZE,
         )
 
 
@@ -50,10 +86,14 @@ class BatchStats:
         self.service_stats: dict[tuple, list[int]] = {}
         self.response_code_stats: dict[tuple, list[int]] = {}
         self.request_time_stats: dict[tuple, list[int]] = {}
+        self.path_stats: dict[tuple, list[int]] = {}
         self.path_time_stats: dict[tuple, list[int]] = {}
         self.query_param_time_stats: dict[tuple, list[int]] = {}
         self.header_time_stats: dict[tuple, list[int]] = {}
         self.flag_time_stats: dict[tuple, list[int]] = {}
+        self.tcp_stats: dict[tuple, list[int]] = {}
+        self.tcp_connection_stats: dict[tuple, list[int]] = {}
+        self.tcp_connection_time_stats: dict[tuple, list[int]] = {}
 
     @staticmethod
     def accumulate(buffer: dict[tuple, list[int]], key: tuple, values: tuple[int, ...]) -> None:
@@ -101,6 +141,9 @@ class BatchStats:
     ) -> None:
         self.accumulate(self.request_time_stats, (port, time), (count, blocked_count))
 
+    def add_path(self, port: int, path: str, count: int = 1) -> None:
+        self.accumulate(self.path_stats, (port, path), (count,))
+
     def add_path_time(self, port: int, method: str, path: str, time: int, count: int = 1) -> None:
         self.accumulate(self.path_time_stats, (port, method, path, time), (count,))
 
@@ -117,29 +160,67 @@ class BatchStats:
     ) -> None:
         self.accumulate(self.flag_time_stats, (port, time), (write_count, read_count))
 
-    def flush(self, tx: Cursor) -> None:
-        bulk_upsert(tx, "service_stats", ["port"], SERVICE_SUM_COLS, self.service_stats)
-        bulk_upsert(
-            tx, "http_response_code_stats", ["port", "status_code"], ["count"],
-            self.response_code_stats,
-        )
-        bulk_upsert(
-            tx, "http_request_time_stats", ["port", "time"], ["count", "blocked_count"],
-            self.request_time_stats,
-        )
-        bulk_upsert(
-            tx, "http_path_time_stats", ["port", "method", "path", "time"], ["count"],
-            self.path_time_stats,
-        )
-        bulk_upsert(
-            tx, "http_query_param_time_stats", ["port", "param", "value", "time"], ["count"],
-            self.query_param_time_stats,
+    def add_tcp(
+        self, port: int, bytes_in: int, bytes_out: int, duration_ms: int, flags_found: int = 0
+    ) -> None:
+        self.accumulate(
+            self.tcp_stats, (port,), (1, bytes_in, bytes_out, duration_ms, flags_found)
         )
-        bulk_upsert(
-            tx, "http_header_time_stats", ["port", "name", "value", "time"], ["count"],
-            self.header_time_stats,
+
+    def add_tcp_connection(
+        self, port: int, read_min: int, read_max: int, write_min: int, write_max: int
+    ) -> None:
+        self.accumulate(
+            self.tcp_connection_stats, (port, read_min, read_max, write_min, write_max), (1,)
         )
-        bulk_upsert(
-            tx, "flag_time_stats", ["port", "time"], ["write_count", "read_count"],
-            self.flag_time_stats,
+
+    def add_tcp_connection_time(
+        self, port: int, read_min: int, read_max: int, write_min: int, write_max: int, time: int
+    ) -> None:
+        self.accumulate(
+            self.tcp_connection_time_stats,
+            (port, read_min, read_max, write_min, write_max, time),
+            (1,),
         )
+
+    def flush(self, tx: Cursor) -> None:
+        with tx.connection.pipeline():
+            bulk_upsert(tx, "service_stats", ["port"], SERVICE_SUM_COLS, self.service_stats)
+            bulk_upsert(
+                tx, "http_response_code_stats", ["port", "status_code"], ["count"],
+                self.response_code_stats,
+            )
+            bulk_upsert(
+                tx, "http_request_time_stats", ["port", "time"], ["count", "blocked_count"],
+                self.request_time_stats,
+            )
+            HttpPathStatsTable().increment_many(
+                tx, {key: count for key, (count,) in self.path_stats.items()}
+            )
+            bulk_upsert(
+                tx, "http_path_time_stats", ["port", "method", "path", "time"], ["count"],
+                self.path_time_stats,
+            )
+            bulk_upsert(
+                tx, "http_query_param_time_stats", ["port", "param", "value", "time"], ["count"],
+                self.query_param_time_stats,
+            )
+            bulk_upsert(
+                tx, "http_header_time_stats", ["port", "name", "value", "time"], ["count"],
+                self.header_time_stats,
+            )
+            bulk_upsert(
+                tx, "flag_time_stats", ["port", "time"], ["write_count", "read_count"],
+                self.flag_time_stats,
+            )
+            upsert_tcp_stats(tx, self.tcp_stats)
+            bulk_upsert(
+                tx, "tcp_connection_stats",
+                ["port", "read_min", "read_max", "write_min", "write_max"],
+                ["count"], self.tcp_connection_stats,
+            )
+            bulk_upsert(
+                tx, "tcp_connection_time_stats",
+                ["port", "read_min", "read_max", "write_min", "write_max", "time"],
+                ["count"], self.tcp_connection_time_stats,
+            )
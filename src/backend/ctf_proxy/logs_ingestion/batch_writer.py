@@ -1,6 +1,8 @@
 import logging
+from collections.abc import Callable
 from dataclasses import fields
-from time import perf_counter
+from functools import cache
+from operator import attrgetter
 
 import psycopg
 from psycopg import Cursor
@@ -12,6 +14,8 @@ from ctf_proxy.db.tables.http_request import HttpRequestRow
 from ctf_proxy.db.tables.http_response import HttpResponseRow
 from ctf_proxy.db.tables.session import SessionRow
 from ctf_proxy.db.tables.session_link import SessionLinkRow
+from ctf_proxy.db.tables.tcp_connection import TcpConnectionRow
+from ctf_proxy.db.tables.tcp_event import TcpEventRow
 from ctf_proxy.db.tables.websocket_connection import WebSocketConnectionRow
 from ctf_proxy.db.tables.websocket_frame import WebSocketFrameRow
 
@@ -40,6 +44,8 @@ FLUSH_ORDER = [
     HttpRequestRow.Insert,
     HttpResponseRow.Insert,
     WebSocketConnectionRow.Insert,
+    TcpConnectionRow.Insert,
+    TcpEventRow.Insert,
     FlagRow.Insert,
     WebSocketFrameRow.Insert,
     SessionLinkRow.Insert,
@@ -50,6 +56,16 @@ def columns_of(insert_cls) -> list[str]:
     return [f.name for f in fields(insert_cls)]
 
 
+@cache
+def row_getter(insert_cls) -> Callable[[object], tuple]:
+    """Extract an Insert's column values as a tuple in columns_of order with one call."""
+    columns = columns_of(insert_cls)
+    if len(columns) == 1:
+        name = columns[0]
+        return lambda obj: (getattr(obj, name),)
+    return attrgetter(*columns)
+
+
 def flush_objects(tx: Cursor, objs: list, isolate: bool = False) -> list:
     """Bulk-insert a homogeneous list of Insert dataclasses, resolving Ref params.
 
@@ -65,13 +81,13 @@ def flush_objects(tx: Cursor, objs: list, isolate: bool = False) -> list:
     returning = getattr(insert_cls, "RETURNING", False)
     conflict = getattr(insert_cls, "CONFLICT", "")
 
+    getter = row_getter(insert_cls)
     live_index: list[int] = []
     rows: list[list] = []
     for i, obj in enumerate(objs):
         row = []
         drop = False
-        for name in columns:
-            value = getattr(obj, name)
+        for value in getter(obj):
             if isinstance(value, Ref):
                 if not value.resolved:
                     drop = True
@@ -106,7 +122,7 @@ def flush_with_isolation_fallback(tx: Cursor, do_flush, reset) -> None:
             # transient/global (connection lost, shutdown, out-of-resources): do NOT
             # drop rows — propagate so the batch is retried without advancing.
             raise
-        logger.warning(f"Batch flush failed ({e}); retrying with per-row isolation")
+        logger.warning("Batch flush failed (%s); retrying with per-row isolation", e)
         reset()
         do_flush(True)
 
@@ -149,24 +165,6 @@ class Batch:
         for insert_cls in FLUSH_ORDER:
             self.flush_ops(tx, insert_cls, isolate)
 
-    def flush_tables_timed(self, tx: Cursor) -> dict[str, float]:
-        """TEMP diagnostic: flush each table in its OWN transaction (commit per table)
-        and return {table: seconds}. No isolation fallback — for measurement only."""
-        timings: dict[str, float] = {}
-        if self.session_refs:
-            t = perf_counter()
-            self.flush_sessions(tx, isolate=False)
-            tx.connection.commit()
-            timings["session"] = perf_counter() - t
-        for insert_cls in FLUSH_ORDER:
-            if not self.ops.get(insert_cls):
-                continue
-            t = perf_counter()
-            self.flush_ops(tx, insert_cls, isolate=False)
-            tx.connection.commit()
-            timings[insert_cls.TABLE] = perf_counter() - t
-        return timings
-
     def flush_sessions(self, tx: Cursor, isolate: bool = False) -> None:
         if not self.session_refs:
             return
@@ -209,7 +207,7 @@ def insert_rows(
         for i in indices:
             params.extend(rows[i])
         sql = f"INSERT INTO {table} ({cols_sql}) VALUES {values} {conflict}{returning_sql}"
-        tx.execute(sql, params)
+        tx.execute(sql, params, prepare=len(indices) == MAX_ROWS_PER_INSERT)
         if returning:
             for i, returned_row in zip(indices, tx.fetchall(), strict=True):
                 result[i] = returned_row[0]
@@ -228,7 +226,7 @@ def insert_rows(
                 # transient/global error — never drop rows over it; abort the flush.
                 raise
             if len(indices) == 1:
-                logger.error(f"Dropping bad row {rows[indices[0]]} in {table}: {e}")
+                logger.error("Dropping bad row %s in %s: %s", rows[indices[0]], table, e)
                 return
             mid = len(indices) // 2
             isolate_recurse(indices[:mid])
@@ -1,8 +1,9 @@
 import re
 
 
-def find_body_flags(body: str, pattern: str) -> list[tuple[int, str]]:
-    flags = []
-    for match in re.finditer(pattern, body):
-        flags.append((match.start(), match.group(0)))
-    return flags
+def find_body_flags(body: bytes, pattern: re.Pattern[bytes]) -> list[tuple[int, str]]:
+    # offsets are byte offsets into body, for HTTP bodies and TCP payloads alike
+    return [
+        (match.start(), match.group(0).decode("utf-8", errors="ignore"))
+        for match in pattern.finditer(body)
+    ]
@@ -1,16 +1,15 @@
 import base64
 import json
 import logging
-import os
 import re
+from collections.abc import Iterator
 from datetime import datetime
 from time import perf_counter
-from urllib.parse import parse_qs, urlparse
+from urllib.parse import unquote_plus, urlparse
 
 from psycopg import Cursor
 
 from ctf_proxy.common.config import Config
-from ctf_proxy.db.connection import nul_safe
 from ctf_proxy.db.models import (
     FlagRow,
     HttpRequestRow,
@@ -36,10 +35,6 @@ from ctf_proxy.logs_ingestion.ws import parse_ws_frames
 
 DEFAULT_DURATION_MS = 100
 
-# TEMP diagnostic: set PER_TABLE_TX=1 to flush each table in its own transaction and
-# log per-table time. Off by default (uses the normal single-transaction flush).
-PER_TABLE_TX = os.environ.get("PER_TABLE_TX") == "1"
-
 logger = logging.getLogger(__name__)
 
 
@@ -50,45 +45,78 @@ IGNORED_HEADER_STATS = {
     "x-request-id",
 }
 
+MAX_HEADER_NAMES = 4096
 
-def serialize_headers(headers: "HttpTapHeaders") -> str:
-    return json.dumps(
-        [[name, value] for name, values in headers.values.items() for value in values],
-        separators=(",", ":"),
-    )
+HEADER_NAMES: dict[str, str] = {}
 
+MAX_INTERNED_VALUES = 65536
 
-class PathStatsAggregator:
-    def __init__(self):
-        self.counts: dict[tuple, int] = {}
-
-    def record(self, port: int, path: str):
-        key = (port, path)
-        self.counts[key] = self.counts.get(key, 0) + 1
-
-    def flush(self, tx: Cursor, isolate: bool = False) -> None:
-        if not self.counts:
-            return
-
-        items = list(self.counts.items())
-        for start in range(0, len(items), 1000):
-            chunk = items[start : start + 1000]
-            values = ", ".join(["(%s, %s, %s)"] * len(chunk))
-            params: list = []
-            for (port, path), count in chunk:
-                params.extend((port, nul_safe(path), count))
-            tx.execute(
-                f"INSERT INTO http_path_stats (port, path, count) VALUES {values} "
-                "ON CONFLICT (port, path) DO UPDATE SET count = http_path_stats.count + EXCLUDED.count",
-                params,
-            )
+INTERNED_VALUES: dict[str, str] = {}
+
+HEADERS_ENCODER = json.JSONEncoder(separators=(",", ":"))
+
+
+def normalize_header_name(key: str) -> str:
+    name = HEADER_NAMES.get(key)
+    if name is None:
+        name = key.lower()
+        if len(HEADER_NAMES) < MAX_HEADER_NAMES:
+            HEADER_NAMES[key] = name
+    return name
+
+
+def intern_value(value: str) -> str:
+    interned = INTERNED_VALUES.get(value)
+    if interned is None:
+        if len(INTERNED_VALUES) < MAX_INTERNED_VALUES:
+            INTERNED_VALUES[value] = value
+        return value
+    return interned
+
+
+def split_path(full_path: str) -> tuple[str, str]:
+    if not full_path.startswith("/"):
+        parsed_url = urlparse(full_path)
+        return parsed_url.path, parsed_url.query
+    path, _, query = full_path.partition("#")[0].partition("?")
+    return path, query
+
+
+def unquote_param(value: str) -> str:
+    if "%" not in value and "+" not in value:
+        return value
+    return unquote_plus(value)
+
+
+def iter_query_params(query: str) -> Iterator[tuple[str, str]]:
+    for pair in query.split("&"):
+        if pair:
+            name, _, value = pair.partition("=")
+            yield unquote_param(name), unquote_param(value)
+
+
+def body_text(body: bytes | None) -> str | None:
+    if body is None:
+        return None
+    return body.decode("utf-8", errors="ignore")
+
+
+def serialize_headers(headers: "HttpTapHeaders") -> str:
+    return HEADERS_ENCODER.encode(
+        [(name, value) for name, values in headers.values.items() for value in values]
+    )
 
 
 class HttpTapsFolder(TapsFolder):
+    id_pattern = re.compile(rb'"key"\s*:\s*"x-request-id"\s*,\s*"value"\s*:\s*"([^"\\]*)"')
+
     def __init__(self, path: str):
         super().__init__(path)
         self.request_id_to_file: dict[str, str] = {}
 
+    def on_id_found(self, filename: str, value: bytes):
+        self.request_id_to_file[value.decode()] = filename
+
     def on_file_loaded(self, filename: str, data: dict):
         request_id = self.extract_request_id_from_tap(filename, data)
         if request_id:
@@ -107,9 +135,9 @@ class HttpTapsFolder(TapsFolder):
                 if header.get("key") == "x-request-id":
                     return header.get("value")
         except Exception as e:
-            logger.error(f"Error extracting request ID from {filename}: {e}")
+            logger.error("Error extracting request ID from %s: %s", filename, e)
 
-        logger.error(f"Could not extract request ID from tap file {filename}")
+        logger.error("Could not extract request ID from tap file %s", filename)
         return None
 
     def pop_tap_filename_by_request_id(self, request_id: str) -> str | None:
@@ -123,6 +151,7 @@ class HttpProcessor:
         self.access_log = AccessLogReader(access_log_path)
         self.taps_folder = HttpTapsFolder(taps_dir)
         self.tap_processor = HttpTapProcessor(db, config)
+        self.pending_position: int | None = None
 
     def process_new_access_log_entries(self, tx: Cursor, batch_id: str):
         t_start = perf_counter()
@@ -134,27 +163,27 @@ class HttpProcessor:
         to_archive = {}
         writer = Batch()
         stats = BatchStats()
-        paths = PathStatsAggregator()
 
         for entry in new_entries:
             log_entry = entry.data
             stream_id = log_entry.get("stream_id")
             if not stream_id:
                 # should not happen if access log is well-formed
-                logger.warning(f"Access log entry missing stream_id: {log_entry}")
+                logger.warning("Access log entry missing stream_id: %s", log_entry)
                 continue
 
             tap_filename = self.taps_folder.pop_tap_filename_by_request_id(stream_id)
             if not tap_filename:
                 # tap files are written first, if it's missing, just skip it
-                logger.warning(f"Tap file not found for stream_id {stream_id}: {log_entry}")
+                logger.warning("Tap file not found for stream_id %s: %s", stream_id, log_entry)
                 continue
 
             tap_data = self.taps_folder.pop_filename(tap_filename)
             if not tap_data:
-                logger.warning(f"Tap data not loaded for file {tap_filename}")
+                logger.warning("Tap data not loaded for file %s", tap_filename)
                 continue
 
+            to_archive[tap_filename] = tap_data
             try:
                 self.tap_processor.process_tap(
                     data=tap_data,
@@ -163,11 +192,9 @@ class HttpProcessor:
                     log_entry=log_entry,
                     writer=writer,
                     stats=stats,
-                    paths=paths,
                 )
-                to_archive[tap_filename] = tap_data
             except Exception as e:
-                logger.error(f"Error processing tap file {tap_filename}: {e}")
+                logger.error("Error processing tap file %s: %s", tap_filename, e)
 
         t_process = perf_counter()
 
@@ -178,44 +205,19 @@ class HttpProcessor:
             writer.flush(tx, isolate=isolate)
             flush_times["rows"] = perf_counter() - t
             t = perf_counter()
-            paths.flush(tx, isolate=isolate)
-            flush_times["paths"] = perf_counter() - t
-            t = perf_counter()
             stats.flush(tx)
             flush_times["stats"] = perf_counter() - t
 
-        if PER_TABLE_TX:
-            table_times = writer.flush_tables_timed(tx)
-            flush_times["rows"] = sum(table_times.values())
-            t = perf_counter()
-            paths.flush(tx, isolate=False)
-            tx.connection.commit()
-            flush_times["paths"] = perf_counter() - t
-            t = perf_counter()
-            stats.flush(tx)
-            tx.connection.commit()
-            flush_times["stats"] = perf_counter() - t
-            logger.info(
-                "PER-TABLE flush: %s paths=%.0f stats=%.0f ms",
-                " ".join(f"{name}={secs * 1000:.0f}" for name, secs in table_times.items()),
-                flush_times["paths"] * 1000,
-                flush_times["stats"] * 1000,
-            )
-        else:
-            flush_with_isolation_fallback(tx, do_flush, writer.reset)
+        flush_with_isolation_fallback(tx, do_flush, writer.reset)
         t_flush = perf_counter()
 
         if new_entries:
-            last_position = new_entries[-1].end_position
-            self.access_log.write_last_processed_position(last_position)
-
-        self.taps_folder.cleanup()
-        t_cleanup = perf_counter()
+            self.pending_position = new_entries[-1].end_position
 
         if new_entries:
             logger.info(
                 "HTTP batch: entries=%d matched=%d | read=%.0f refresh=%.0f process=%.0f "
-                "flush=%.0f (rows=%.0f paths=%.0f stats=%.0f) cleanup=%.0f | total=%.0f ms",
+                "flush=%.0f (rows=%.0f stats=%.0f) | total=%.0f ms",
                 len(new_entries),
                 len(to_archive),
                 (t_read - t_start) * 1000,
@@ -223,28 +225,18 @@ class HttpProcessor:
                 (t_process - t_refresh) * 1000,
                 (t_flush - t_process) * 1000,
                 flush_times.get("rows", 0) * 1000,
-                flush_times.get("paths", 0) * 1000,
                 flush_times.get("stats", 0) * 1000,
-                (t_cleanup - t_flush) * 1000,
-                (t_cleanup - t_start) * 1000,
+                (t_flush - t_start) * 1000,
             )
 
         return to_archive
 
-    def check_is_websocket(self, tap_data: dict) -> bool:
-        try:
-            http_trace = tap_data.get("http_buffered_trace", {})
-            request = http_trace.get("request", {})
-            request_headers = {
-                h.get("key", "").lower(): h.get("value", "")
-                for h in request.get("headers", [])
-                if h.get("key")
-            }
-            upgrade_header = request_headers.get("upgrade", "").lower()
-            connection_header = request_headers.get("connection", "").lower()
-            return upgrade_header == "websocket" and "upgrade" in connection_header
-        except Exception:
-            return False
+    def commit_progress(self) -> None:
+        if self.pending_position is not None:
+            self.access_log.write_last_processed_position(self.pending_position)
+            self.access_log.flush()
+            self.pending_position = None
+        self.taps_folder.cleanup()
 
 
 class HttpTapPartBody:
@@ -256,23 +248,23 @@ class HttpTapPartBody:
 class HttpTapHeaders:
     def __init__(self, data: list[dict]):
         self.data = data
-        self.values = {}
+        self.values: dict[str, list[str]] = {}
         for header in data:
-            key = header.get("key") or ""
-            normalized_key = key.lower()
-            value = header.get("value")
-            if normalized_key not in self.values:
-                self.values[normalized_key] = []
-            self.values[normalized_key].append(value)
+            normalized_key = normalize_header_name(header.get("key") or "")
+            values = self.values.get(normalized_key)
+            if values is None:
+                self.values[normalized_key] = [header.get("value")]
+            else:
+                values.append(header.get("value"))
 
     def get(self, key: str, default: str = None) -> str | None:
-        values = self.values.get(key.lower())
+        values = self.values.get(normalize_header_name(key))
         if values:
             return values[0]
         return default
 
     def get_list(self, key: str) -> list[str]:
-        return self.values.get(key.lower(), [])
+        return self.values.get(normalize_header_name(key), [])
 
 
 class HttpTapPart:
@@ -306,30 +298,8 @@ class HttpTapProcessor:
         log_entry: dict,
         writer: Batch,
         stats: BatchStats,
-        paths: PathStatsAggregator,
     ):
         tap = HttpTap(data)
-        # http_trace = data.get("http_buffered_trace", {})
-        # request = http_trace.get("request", {})
-        # response = http_trace.get("response", {})
-
-        # request_headers = [
-        #     (h.get("key").lower(), h.get("value"))
-        #     for h in request.get("headers", [])
-        #     if h.get("key")
-        # ]
-        # request_headers_dict = dict(request_headers)
-        # request_trailers = {
-        #     h.get("key").lower(): h.get("value")
-        #     for h in request.get("trailers", [])
-        #     if h.get("key")
-        # }
-        # response_headers = [
-        #     (h.get("key").lower(), h.get("value"))
-        #     for h in response.get("headers", [])
-        #     if h.get("key")
-        # ]
-        # response_headers_dict = dict(response_headers)
 
         is_blocked = tap.request.trailers.get("x-blocked") == "1"
 
@@ -340,17 +310,12 @@ class HttpTapProcessor:
         method = log_entry.get("method") or tap.request.headers.get(":method")
         full_path = log_entry.get("path") or tap.request.headers.get(":path") or ""
         try:
-            parsed_url = urlparse(full_path)
-            path = parsed_url.path
-            query = parsed_url.query
+            path, query = split_path(full_path)
         except Exception:
             path = full_path
             query = ""
-
-        try:
-            query_params = parse_qs(query, keep_blank_values=True) if query else {}
-        except Exception:
-            query_params = {}
+        method = intern_value(method) if method else method
+        path = intern_value(path)
 
         status_str = log_entry.get("status") or tap.response.headers.get(":status")
         status = int(status_str) if status_str and str(status_str).isdigit() else -1
@@ -358,31 +323,26 @@ class HttpTapProcessor:
         user_agent = tap.request.headers.get("user-agent")
         start_time_str = log_entry.get("start_time")
 
-        start_time = (
-            datetime.fromisoformat(start_time_str.replace("Z", "+00:00"))
-            if start_time_str
-            else datetime.now()
-        )
+        start_time = datetime.fromisoformat(start_time_str) if start_time_str else datetime.now()
         start_time_ts = convert_datetime_to_timestamp(start_time)
-        start_minute = start_time.replace(second=0, microsecond=0)
-        start_minute_ts = convert_datetime_to_timestamp(start_minute)
+        start_minute_ts = start_time_ts - start_time_ts % 60_000
 
         upstream_host = log_entry.get("upstream_host", "")
         port = try_get_port_from_upstream_host(upstream_host)
 
         service_config = self.config.get_service_by_port(port) if port else None
 
-        req_body = self.decode_body(tap.request.body.bytes)
-        resp_body = self.decode_body(tap.response.body.bytes)
+        req_bytes = self.decode_body(tap.request.body.bytes)
+        resp_bytes = self.decode_body(tap.response.body.bytes)
 
         request_ref = writer.insert(
             HttpRequestRow.Insert(
                 port=port or 0,
-                start_time=convert_datetime_to_timestamp(start_time),
+                start_time=start_time_ts,
                 path=full_path,
                 method=method or "",
                 user_agent=user_agent,
-                body=req_body,
+                body=body_text(req_bytes),
                 is_blocked=int(is_blocked),
                 is_websocket=int(is_websocket),
                 tap_id=tap_id,
@@ -395,14 +355,14 @@ class HttpTapProcessor:
             HttpResponseRow.Insert(
                 request_id=request_ref,
                 status=status,
-                body=resp_body,
+                body=body_text(resp_bytes),
                 response_headers=serialize_headers(tap.response.headers),
             )
         )
 
         if not is_websocket:
-            flags_written = list(find_body_flags(req_body or "", self.config.flag_format))
-            flags_retrieved = list(find_body_flags(resp_body or "", self.config.flag_format))
+            flags_written = find_body_flags(req_bytes or b"", self.config.flag_pattern)
+            flags_retrieved = find_body_flags(resp_bytes or b"", self.config.flag_pattern)
             flag_rows = [
                 FlagRow.Insert(
                     value=flag, http_request_id=request_ref, location="body", offset=offset
@@ -429,11 +389,8 @@ class HttpTapProcessor:
                 total_flags_retrieved=len(flags_retrieved),
             )
             stats.add_response_code(port=port, status_code=status, count=1)
-            if not service_config or not any(
-                re.fullmatch(ignored.path, path) and method == ignored.method
-                for ignored in service_config.ignore_path_stats
-            ):
-                paths.record(port, path)
+            if not service_config or not service_config.is_ignored_path(method, path):
+                stats.add_path(port=port, path=path)
                 stats.add_path_time(
                     port=port,
                     method=method,
@@ -441,30 +398,26 @@ class HttpTapProcessor:
                     time=start_minute_ts,
                     count=1,
                 )
-            for param, values in query_params.items():
-                reg = (
-                    re.compile(service_config.ignore_query_param_stats[param])
-                    if service_config and param in service_config.ignore_query_param_stats
-                    else None
+            ignore_query_params = (
+                service_config.ignore_query_param_patterns if service_config else {}
+            )
+            ignore_headers = service_config.ignore_header_patterns if service_config else {}
+            ignored_headers = service_config.ignored_header_names if service_config else ()
+            for param, value in iter_query_params(query):
+                reg = ignore_query_params.get(param)
+                if reg and reg.fullmatch(value):
+                    continue
+                stats.add_query_param_time(
+                    port=port,
+                    param=param,
+                    value=value,
+                    time=start_minute_ts,
+                    count=1,
                 )
-                for value in values:
-                    if reg and reg.fullmatch(value):
-                        continue
-                    stats.add_query_param_time(
-                        port=port,
-                        param=param,
-                        value=value,
-                        time=start_minute_ts,
-                        count=1,
-                    )
             for key, values in tap.request.headers.values.items():
-                if key in IGNORED_HEADER_STATS:
+                if key in IGNORED_HEADER_STATS or key in ignored_headers:
                     continue
-                reg = (
-                    re.compile(service_config.ignore_header_stats[key])
-                    if service_config and key in service_config.ignore_header_stats
-                    else None
-                )
+                reg = ignore_headers.get(key)
                 for value in values:
                     if reg and reg.fullmatch(value):
                         continue
@@ -506,20 +459,27 @@ class HttpTapProcessor:
                 )
 
         if is_websocket:
-            self.process_websocket(writer, tap, request_ref)
+            self.process_websocket(writer, tap, request_ref, req_bytes or b"", resp_bytes or b"")
 
-    def process_websocket(self, writer: Batch, tap: HttpTap, request_ref: Ref):
+    def process_websocket(
+        self,
+        writer: Batch,
+        tap: HttpTap,
+        request_ref: Ref,
+        request_body: bytes,
+        response_body: bytes,
+    ):
         connection_ref = writer.insert(WebSocketConnectionRow.Insert(http_request_id=request_ref))
 
         request_frames = parse_ws_frames(
-            tap.request.body.bytes,
+            request_body,
             is_client=True,
             extensions_header=", ".join(tap.request.headers.get_list("sec-websocket-extensions")),
             max_size=None,  # todo what to pass
         )
 
         response_frames = parse_ws_frames(
-            tap.response.body.bytes,
+            response_body,
             is_client=False,
             extensions_header=", ".join(tap.response.headers.get_list("sec-websocket-extensions")),
             max_size=None,  # todo what to pass
@@ -542,8 +502,8 @@ class HttpTapProcessor:
         if frame_rows:
             writer.insert_many(frame_rows)
 
-    def decode_body(self, body_data: str | None) -> str | None:
+    def decode_body(self, body_data: str | None) -> bytes | None:
         if body_data is None:
             return None
 
-        return base64.b64decode(body_data).decode("utf-8", errors="ignore")
+        return base64.b64decode(body_data)
@@ -1,9 +1,9 @@
-from bisect import bisect_left, bisect_right, insort
+from bisect import bisect_left, bisect_right
 from collections import defaultdict
-from http.cookies import SimpleCookie
+from collections.abc import Sequence
 from typing import NamedTuple
 
-from ctf_proxy.common.config import Config
+from ctf_proxy.common.config import DEFAULT_SESSION_COOKIE_NAMES, Config
 
 __all__ = ["SessionsStorage"]
 
@@ -13,6 +13,32 @@ Timestamp = int
 Headers = dict[str, list[str]]
 Session = str
 
+DEFAULT_SESSION_COOKIE_NAME_SET = frozenset(DEFAULT_SESSION_COOKIE_NAMES)
+
+REQUEST_ID_BITS = 40
+
+PRUNE_EVERY_REQUESTS = 1000
+
+
+def request_key(port: Port, request_id: RequestID) -> int:
+    return port << REQUEST_ID_BITS | request_id
+
+
+def unquote_cookie_value(value: str) -> str:
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return value[1:-1]
+    return value
+
+
+def parse_named_cookies(header_value: str, names: frozenset[str]) -> dict[str, str]:
+    cookies: dict[str, str] = {}
+    for pair in header_value.split(";"):
+        name, sep, value = pair.partition("=")
+        name = name.strip()
+        if sep and name in names:
+            cookies[name] = unquote_cookie_value(value.strip())
+    return cookies
+
 
 class RequestInfo(NamedTuple):
     start_time: Timestamp
@@ -28,94 +54,92 @@ class Link(NamedTuple):
 class SessionRequests:
     def __init__(self) -> None:
         self.requests: list[tuple[Timestamp, RequestID]] = []
+        self.is_sorted = True
 
     def add_request(self, timestamp: Timestamp, request_id: RequestID) -> None:
-        insort(self.requests, (timestamp, request_id))
+        entry = (timestamp, request_id)
+        if self.requests and entry < self.requests[-1]:
+            self.is_sorted = False
+        self.requests.append(entry)
+
+    def ensure_sorted(self) -> None:
+        if not self.is_sorted:
+            self.requests.sort()
+            self.is_sorted = True
+
+    def drop_before(self, timestamp: Timestamp) -> None:
+        self.ensure_sorted()
+        index = bisect_left(self.requests, (timestamp, 0))
+        if index:
+            del self.requests[:index]
 
     def find_request_before(self, timestamp: Timestamp) -> RequestID | None:
+        self.ensure_sorted()
         index = bisect_left(self.requests, (timestamp, 0))
         if index > 0:
             return self.requests[index - 1][1]
         return None
 
     def find_request_after(self, timestamp: Timestamp) -> RequestID | None:
+        self.ensure_sorted()
         index = bisect_right(self.requests, (timestamp, float("inf")))
         if index < len(self.requests):
             return self.requests[index][1]
         return None
 
 
+def find_session_requests(
+    sessions: dict[Port, dict[Session, SessionRequests]], port: Port, session: Session
+) -> SessionRequests | None:
+    port_sessions = sessions.get(port)
+    if port_sessions is None:
+        return None
+    return port_sessions.get(session)
+
+
 class SessionsStorage:
     def __init__(self, config: Config) -> None:
-        self.requests: dict[tuple[Port, RequestID], RequestInfo] = defaultdict()
-        self.request_sessions: dict[tuple[Port, Session], SessionRequests] = defaultdict(
-            SessionRequests
+        self.requests: dict[int, RequestInfo] = {}
+        self.request_sessions: dict[Port, dict[Session, SessionRequests]] = defaultdict(
+            lambda: defaultdict(SessionRequests)
         )
-        self.response_sessions: dict[tuple[Port, Session], SessionRequests] = defaultdict(
-            SessionRequests
+        self.response_sessions: dict[Port, dict[Session, SessionRequests]] = defaultdict(
+            lambda: defaultdict(SessionRequests)
         )
         self.config = config
+        self.latest_start_time: Timestamp = 0
+        self.requests_since_prune = 0
 
-    def get_in_session(self, headers: Headers, port: Port) -> Session | None:
-        cookie_headers = headers.get("cookie", [])
-        if not cookie_headers:
-            return None
-
+    def get_cookie_names(self, port: Port) -> tuple[Sequence[str], frozenset[str]]:
         service = self.config.get_service_by_port(port)
-        cookie_names = (
-            service.session_cookie_names
-            if service
-            else [
-                "session",
-                "sessid",
-                "sid",
-                "token",
-                "auth",
-                "sessionid",
-                ".AspNetCore.Identity.Application",
-            ]
-        )
+        if service:
+            return service.session_cookie_names, service.session_cookie_name_set
+        return DEFAULT_SESSION_COOKIE_NAMES, DEFAULT_SESSION_COOKIE_NAME_SET
 
+    def find_session(self, cookie_headers: list[str], port: Port) -> Session | None:
+        cookie_names, name_set = self.get_cookie_names(port)
         for cookie_value in cookie_headers:
-            cookie = SimpleCookie()
-            cookie.load(cookie_value)
-
+            cookies = parse_named_cookies(cookie_value, name_set)
             for cookie_name in cookie_names:
-                if cookie_name in cookie:
-                    return cookie[cookie_name].value
+                if cookie_name in cookies:
+                    return cookies[cookie_name]
 
         return None
 
+    def get_in_session(self, headers: Headers, port: Port) -> Session | None:
+        cookie_headers = headers.get("cookie", [])
+        if not cookie_headers:
+            return None
+        return self.find_session(cookie_headers, port)
+
     def get_out_session(self, headers: Headers, port: Port) -> Session | None:
         set_cookie_headers = headers.get("set-cookie", [])
         if not set_cookie_headers:
             return None
-
-        service = self.config.get_service_by_port(port)
-        cookie_names = (
-            service.session_cookie_names
-            if service
-            else [
-                "session",
-                "sessid",
-                "sid",
-                "token",
-                "auth",
-                "sessionid",
-                ".AspNetCore.Identity.Application",
-            ]
+        return self.find_session(
+            [cookie_value.partition(";")[0] for cookie_value in set_cookie_headers], port
         )
 
-        for cookie_value in set_cookie_headers:
-            cookie = SimpleCookie()
-            cookie.load(cookie_value)
-
-            for cookie_name in cookie_names:
-                if cookie_name in cookie:
-                    return cookie[cookie_name].value
-
-        return None
-
     def add_request(
         self,
         port: Port,
@@ -128,18 +152,45 @@ class SessionsStorage:
         out_session = self.get_out_session(response_headers, port)
 
         if in_session or out_session:
-            self.requests[(port, request_id)] = RequestInfo(start_time, in_session, out_session)
+            self.requests[request_key(port, request_id)] = RequestInfo(
+                start_time, in_session, out_session
+            )
 
         if in_session:
-            self.request_sessions[(port, in_session)].add_request(start_time, request_id)
+            self.request_sessions[port][in_session].add_request(start_time, request_id)
         if out_session:
-            self.response_sessions[(port, out_session)].add_request(start_time, request_id)
+            self.response_sessions[port][out_session].add_request(start_time, request_id)
+
+        self.latest_start_time = max(self.latest_start_time, start_time)
+        self.requests_since_prune += 1
+        if self.requests_since_prune >= PRUNE_EVERY_REQUESTS:
+            self.prune()
 
         return [s for s in (in_session, out_session) if s is not None]
 
+    def prune(self) -> None:
+        self.requests_since_prune = 0
+        max_age = self.config.session_max_age_seconds
+        if not max_age:
+            return
+        cutoff = self.latest_start_time - max_age * 1000
+        self.requests = {
+            key: info for key, info in self.requests.items() if info.start_time >= cutoff
+        }
+        for sessions in (self.request_sessions, self.response_sessions):
+            for port in list(sessions):
+                port_sessions = sessions[port]
+                for session in list(port_sessions):
+                    session_requests = port_sessions[session]
+                    session_requests.drop_before(cutoff)
+                    if not session_requests.requests:
+                        del port_sessions[session]
+                if not port_sessions:
+                    del sessions[port]
+
     def get_links(self, port: Port, request_id: RequestID) -> list[Link]:
         links: list[Link] = []
-        request_info = self.requests.get((port, request_id))
+        request_info = self.requests.get(request_key(port, request_id))
         if not request_info:
             return links
 
@@ -147,14 +198,14 @@ class SessionsStorage:
         out_session = request_info.session_out
 
         if in_session:
-            session_requests = self.request_sessions.get((port, in_session))
+            session_requests = find_session_requests(self.request_sessions, port, in_session)
             if session_requests:
                 linked_request_id = session_requests.find_request_before(request_info.start_time)
                 if linked_request_id is not None:
                     links.append(Link(linked_request_id, request_id))
 
         if out_session:
-            session_requests = self.response_sessions.get((port, out_session))
+            session_requests = find_session_requests(self.response_sessions, port, out_session)
             if session_requests:
                 linked_request_id = session_requests.find_request_after(request_info.start_time)
                 if linked_request_id is not None:
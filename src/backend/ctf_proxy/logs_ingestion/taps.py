@@ -1,13 +1,18 @@
 import json
 import logging
 import os
+import re
 import shutil
+import time
 
 logger = logging.getLogger(__name__)
 
+MTIME_SETTLE_NS = 2_000_000_000
+
 
 class TapsFolder:
     max_load_retries = 3
+    id_pattern: re.Pattern[bytes] | None = None
 
     def __init__(self, path: str):
         self.path = path
@@ -15,8 +20,13 @@ class TapsFolder:
         self.to_remove = set()
         self.dirs_to_remove = set()
         self.failed_to_load = {}
+        self.scanned_mtime_ns: int | None = None
 
     def refresh(self):
+        mtime_ns = os.stat(self.path).st_mtime_ns
+        if mtime_ns == self.scanned_mtime_ns and not self.failed_to_load:
+            return
+        settled = time.time_ns() - mtime_ns > MTIME_SETTLE_NS
         with os.scandir(self.path) as it:
             for entry in it:
                 if entry.name in self.indexed or entry.name in self.to_remove:
@@ -27,8 +37,11 @@ class TapsFolder:
                         self.try_index_file(entry.name)
                     else:
                         self.to_remove.add(entry.name)
+        self.scanned_mtime_ns = mtime_ns if settled else None
 
     def try_index_file(self, filename: str):
+        if self.id_pattern is not None and self.try_index_by_pattern(filename):
+            return
         data = self.load_file(filename)
         if data is None:
             return
@@ -38,38 +51,56 @@ class TapsFolder:
     def load_file(self, filename: str) -> dict | None:
         file_path = os.path.join(self.path, filename)
         try:
-            with open(file_path) as f:
-                return json.load(f)
+            with open(file_path, "rb") as f:
+                return json.loads(f.read())
         except Exception as e:
             if filename not in self.failed_to_load:
-                logger.error(f"Error loading tap file {file_path}: {e}")
+                logger.error("Error loading tap file %s: %s", file_path, e)
                 self.failed_to_load[filename] = 0
             self.failed_to_load[filename] += 1
             if self.failed_to_load[filename] >= self.max_load_retries:
                 logger.error(
-                    f"Giving up on loading tap file {file_path} after {self.max_load_retries} attempts"
+                    "Giving up on loading tap file %s after %d attempts",
+                    file_path,
+                    self.max_load_retries,
                 )
                 self.to_remove.add(filename)
             return None
 
+    def try_index_by_pattern(self, filename: str) -> bool:
+        try:
+            with open(os.path.join(self.path, filename), "rb") as f:
+                match = self.id_pattern.search(f.read())
+        except OSError:
+            return False
+        if match is None:
+            return False
+        self.indexed.add(filename)
+        self.on_id_found(filename, match.group(1))
+        return True
+
+    def on_id_found(self, filename: str, value: bytes):
+        pass
+
     def on_file_loaded(self, filename: str, data: dict):
         pass
 
     def pop_filename(self, filename: str) -> dict | None:
-        data = self.load_file(filename)
-        if data is not None:
-            self.to_remove.add(filename)
-        return data
+        # popped files stay indexed until remove() is called once they are archived
+        return self.load_file(filename)
 
-    def cleanup(self):
-        for filename in self.to_remove:
+    def remove(self, filenames):
+        for filename in filenames:
             file_path = os.path.join(self.path, filename)
             try:
                 os.remove(file_path)
             except Exception as e:
-                logger.error(f"Error removing tap file {file_path}: {e}")
+                logger.error("Error removing tap file %s: %s", file_path, e)
             self.indexed.discard(filename)
             self.failed_to_load.pop(filename, None)
+
+    def cleanup(self):
+        self.remove(self.to_remove)
         self.to_remove.clear()
 
         for dir_name in self.dirs_to_remove:
@@ -77,5 +108,5 @@ class TapsFolder:
             try:
                 shutil.rmtree(dir_path)
             except Exception as e:
-                logger.error(f"Error removing tap directory {dir_path}: {e}")
+                logger.error("Error removing tap directory %s: %s", dir_path, e)
         self.dirs_to_remove.clear()
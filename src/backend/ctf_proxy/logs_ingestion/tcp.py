@@ -1,5 +1,6 @@
 import base64
 import logging
+import re
 from datetime import datetime
 from time import perf_counter
 
@@ -9,13 +10,13 @@ from ctf_proxy.common.config import Config
 from ctf_proxy.db.models import (
     FlagRow,
     ProxyStatsDB,
-    ServiceStatsRow,
-    TcpConnectionStatsRow,
+    TcpConnectionRow,
     TcpEventRow,
 )
-from ctf_proxy.db.stats import FlagTimeStatsRow
 from ctf_proxy.db.utils import convert_datetime_to_timestamp
 from ctf_proxy.logs_ingestion.access_log import AccessLogReader
+from ctf_proxy.logs_ingestion.batch_stats import BatchStats
+from ctf_proxy.logs_ingestion.batch_writer import Batch, flush_with_isolation_fallback
 from ctf_proxy.logs_ingestion.flags import find_body_flags
 from ctf_proxy.logs_ingestion.taps import TapsFolder
 from ctf_proxy.logs_ingestion.utils import try_get_port_from_upstream_host
@@ -24,10 +25,15 @@ logger = logging.getLogger(__name__)
 
 
 class TcpTapsFolder(TapsFolder):
+    id_pattern = re.compile(rb'"trace_id"\s*:\s*"(\d+)"')
+
     def __init__(self, path: str):
         super().__init__(path)
         self.trace_id_to_file: dict[int, str] = {}
 
+    def on_id_found(self, filename: str, value: bytes):
+        self.trace_id_to_file[int(value)] = filename
+
     def on_file_loaded(self, filename: str, data: dict):
         connection_id = self.extract_trace_id_from_tap(filename, data)
         if connection_id is not None:
@@ -40,9 +46,9 @@ class TcpTapsFolder(TapsFolder):
             if trace_id and trace_id.isdigit():
                 return int(trace_id)
         except Exception as e:
-            logger.error(f"Error extracting connection ID from {filename}: {e}")
+            logger.error("Error extracting connection ID from %s: %s", filename, e)
 
-        logger.error(f"Could not extract connection ID from tap file {filename}")
+        logger.error("Could not extract connection ID from tap file %s", filename)
         return None
 
     def pop_tap_filename_by_trace_id(self, connection_id: int) -> str | None:
@@ -56,6 +62,7 @@ class TcpProcessor:
         self.access_log = AccessLogReader(access_log_path)
         self.taps_folder = TcpTapsFolder(taps_dir)
         self.tap_processor = TcpTapProcessor(db, config)
+        self.pending_position: int | None = None
 
     def process_new_access_log_entries(self, tx: Cursor, batch_id: str):
         t_start = perf_counter()
@@ -65,69 +72,92 @@ class TcpProcessor:
         t_refresh = perf_counter()
 
         to_archive = {}
+        writer = Batch()
+        stats = BatchStats()
         for entry in new_entries:
             log_entry = entry.data
             connection_id = log_entry.get("connection_id")
             if connection_id is None:
                 # should not happen if access log is well-formed
-                logger.warning(f"Access log entry missing connection_id: {log_entry}")
+                logger.warning("Access log entry missing connection_id: %s", log_entry)
                 continue
 
             tap_filename = self.taps_folder.pop_tap_filename_by_trace_id(connection_id)
             if not tap_filename:
                 # tap files are written first, if it's missing, just skip it
                 tap_filename = f"tcp_{connection_id}.json"
-                logger.warning(f"Tap file not found for connection_id {connection_id}: {log_entry}")
+                logger.warning(
+                    "Tap file not found for connection_id %s: %s", connection_id, log_entry
+                )
                 continue
 
             tap_data = self.taps_folder.pop_filename(tap_filename)
             if not tap_data:
-                logger.warning(f"Tap data not loaded for file {tap_filename}")
+                logger.warning("Tap data not loaded for file %s", tap_filename)
                 continue
 
             to_archive[tap_filename] = tap_data
             try:
                 self.tap_processor.process_tap(
-                    tx=tx,
                     data=tap_data,
                     tap_id=tap_filename,
                     batch_id=batch_id,
                     log_entry=log_entry,
+                    writer=writer,
+                    stats=stats,
                 )
             except Exception as e:
-                logger.error(f"Error processing tap file {tap_filename}: {e}")
+                logger.error("Error processing tap file %s: %s", tap_filename, e)
 
         t_process = perf_counter()
 
-        if new_entries:
-            last_position = new_entries[-1].end_position
-            self.access_log.write_last_processed_position(last_position)
+        def do_flush(isolate: bool) -> None:
+            writer.flush(tx, isolate=isolate)
+            stats.flush(tx)
 
-        self.taps_folder.cleanup()
-        t_cleanup = perf_counter()
+        flush_with_isolation_fallback(tx, do_flush, writer.reset)
+        t_flush = perf_counter()
+
+        if new_entries:
+            self.pending_position = new_entries[-1].end_position
 
         if new_entries:
             logger.info(
-                "TCP batch: entries=%d matched=%d | read=%.0f refresh=%.0f process+write=%.0f "
-                "cleanup=%.0f | total=%.0f ms",
+                "TCP batch: entries=%d matched=%d | read=%.0f refresh=%.0f process=%.0f "
+                "flush=%.0f | total=%.0f ms",
                 len(new_entries),
                 len(to_archive),
                 (t_read - t_start) * 1000,
                 (t_refresh - t_read) * 1000,
                 (t_process - t_refresh) * 1000,
-                (t_cleanup - t_process) * 1000,
-                (t_cleanup - t_start) * 1000,
+                (t_flush - t_process) * 1000,
+                (t_flush - t_start) * 1000,
             )
 
         return to_archive
 
+    def commit_progress(self) -> None:
+        if self.pending_position is not None:
+            self.access_log.write_last_processed_position(self.pending_position)
+            self.access_log.flush()
+            self.pending_position = None
+        self.taps_folder.cleanup()
+
 
 class TcpTapProcessor:
     def __init__(self, db: ProxyStatsDB, config: Config):
         self.db = db
         self.config = config
 
-    def process_tap(self, tx: Cursor, data: dict, tap_id: str, batch_id: str, log_entry: dict):
+    def process_tap(
+        self,
+        data: dict,
+        tap_id: str,
+        batch_id: str,
+        log_entry: dict,
+        writer: Batch,
+        stats: BatchStats,
+    ):
         socket_trace = data.get("socket_buffered_trace", {})
         events = socket_trace.get("events", [])
 
@@ -135,14 +165,9 @@ class TcpTapProcessor:
         port = try_get_port_from_upstream_host(upstream_host)
 
         start_time_str = log_entry.get("start_time")
-        start_time = (
-            datetime.fromisoformat(start_time_str.replace("Z", "+00:00"))
-            if start_time_str
-            else datetime.now()
-        )
+        start_time = datetime.fromisoformat(start_time_str) if start_time_str else datetime.now()
         start_time_ts = convert_datetime_to_timestamp(start_time)
-        start_minute = start_time.replace(second=0, microsecond=0)
-        start_minute_ts = convert_datetime_to_timestamp(start_minute)
+        start_minute_ts = start_time_ts - start_time_ts % 60_000
 
         connection_id_from_log = log_entry.get("connection_id")
         bytes_in = log_entry.get("bytes_in", 0)
@@ -150,154 +175,126 @@ class TcpTapProcessor:
         duration_ms = log_entry.get("duration_ms", 0)
         is_blocked = log_entry.get("interceptor_message", "") == "blocked"
 
+        tcp_connection_ref = writer.insert(
+            TcpConnectionRow.Insert(
+                port=port,
+                connection_id=connection_id_from_log or 0,
+                start_time=start_time_ts,
+                duration_ms=duration_ms,
+                bytes_in=bytes_in,
+                bytes_out=bytes_out,
+                is_blocked=int(is_blocked),
+                tap_id=tap_id,
+                batch_id=batch_id,
+            )
+        )
+
         total_read_bytes = 0
         total_write_bytes = 0
-        all_read_data = bytearray()
-        all_write_data = bytearray()
         flags_found = []
-
+        events_to_insert: list[TcpEventRow.Insert] = []
         for event in events:
+            timestamp = int(datetime.fromisoformat(event["timestamp"]).timestamp() * 1000)
+
             if "read" in event:
                 read_data = event["read"]["data"]
                 data_bytes = base64.b64decode(read_data.get("as_bytes", ""))
-                total_read_bytes += len(data_bytes)
-                all_read_data.extend(data_bytes)
-
-                # Check for flags
-                try:
-                    data_text = data_bytes.decode("utf-8", errors="ignore")
-                    for offset, flag in find_body_flags(data_text, self.config.flag_format):
-                        flags_found.append(
-                            ("read", offset + len(all_read_data) - len(data_bytes), flag)
-                        )
-                except Exception as e:
-                    logger.error(f"Error processing read event in tap {tap_id}: {e}")
-
-            elif "write" in event:
-                write_data = event["write"]["data"]
-                data_bytes = base64.b64decode(write_data.get("as_bytes", ""))
-                total_write_bytes += len(data_bytes)
-                all_write_data.extend(data_bytes)
+                data_text = data_bytes.decode("utf-8", errors="ignore")
+                truncated = read_data.get("truncated", False)
 
                 # Check for flags
                 try:
-                    data_text = data_bytes.decode("utf-8", errors="ignore")
-                    for offset, flag in find_body_flags(data_text, self.config.flag_format):
-                        flags_found.append(
-                            ("write", offset + len(all_write_data) - len(data_bytes), flag)
-                        )
+                    for offset, flag in find_body_flags(data_bytes, self.config.flag_pattern):
+                        flags_found.append(("read", offset + total_read_bytes, flag))
                 except Exception as e:
-                    logger.error(f"Error processing write event in tap {tap_id}: {e}")
-
-        tcp_connection_id = self.db.tcp_connections.insert(
-            tx=tx,
-            port=port,
-            connection_id=connection_id_from_log or 0,
-            start_time=start_time_ts,
-            duration_ms=duration_ms,
-            bytes_in=bytes_in,
-            bytes_out=bytes_out,
-            is_blocked=is_blocked,
-            tap_id=tap_id,
-            batch_id=batch_id,
-        )
-
-        events_to_insert: list[TcpEventRow.Insert] = []
-        for event in events:
-            timestamp = int(
-                datetime.fromisoformat(event["timestamp"].replace("Z", "+00:00")).timestamp() * 1000
-            )
-
-            if "read" in event:
-                read_data = event["read"]["data"]
-                data_bytes = base64.b64decode(read_data.get("as_bytes", ""))
-                truncated = read_data.get("truncated", False)
+                    logger.error("Error processing read event in tap %s: %s", tap_id, e)
+                total_read_bytes += len(data_bytes)
 
                 events_to_insert.append(
                     TcpEventRow.Insert(
-                        connection_id=tcp_connection_id,
+                        connection_id=tcp_connection_ref,
                         timestamp=timestamp,
                         event_type="read",
                         data=data_bytes,
-                        data_text=data_bytes.decode("utf-8", errors="ignore"),
+                        data_text=data_text,
                         data_size=len(data_bytes),
-                        truncated=truncated,
+                        truncated=int(truncated),
                     )
                 )
 
             elif "write" in event:
                 write_data = event["write"]["data"]
                 data_bytes = base64.b64decode(write_data.get("as_bytes", ""))
+                data_text = data_bytes.decode("utf-8", errors="ignore")
                 end_stream = event["write"].get("end_stream", False)
                 truncated = write_data.get("truncated", False)
 
+                # Check for flags
+                try:
+                    for offset, flag in find_body_flags(data_bytes, self.config.flag_pattern):
+                        flags_found.append(("write", offset + total_write_bytes, flag))
+                except Exception as e:
+                    logger.error("Error processing write event in tap %s: %s", tap_id, e)
+                total_write_bytes += len(data_bytes)
+
                 events_to_insert.append(
                     TcpEventRow.Insert(
-                        connection_id=tcp_connection_id,
+                        connection_id=tcp_connection_ref,
                         timestamp=timestamp,
                         event_type="write",
                         data=data_bytes,
-                        data_text=data_bytes.decode("utf-8", errors="ignore"),
+                        data_text=data_text,
                         data_size=len(data_bytes),
-                        end_stream=end_stream,
-                        truncated=truncated,
+                        end_stream=int(end_stream),
+                        truncated=int(truncated),
                     )
                 )
 
             elif "closed" in event:
                 events_to_insert.append(
                     TcpEventRow.Insert(
-                        connection_id=tcp_connection_id,
+                        connection_id=tcp_connection_ref,
                         timestamp=timestamp,
                         event_type="closed",
                         data=b"",
                         data_size=0,
-                        end_stream=True,
-                        truncated=False,
+                        end_stream=1,
+                        truncated=0,
                     )
                 )
 
-        self.db.tcp_events.insert_many(tx=tx, events=events_to_insert)
+        writer.insert_many(events_to_insert)
 
         # Insert flags
         if flags_found:
             flags_to_insert = [
                 FlagRow.Insert(
                     value=flag,
-                    tcp_connection_id=tcp_connection_id,
+                    tcp_connection_id=tcp_connection_ref,
                     location=location,
                     offset=offset,
                 )
                 for location, offset, flag in flags_found
             ]
-            self.db.flags.insert_many(tx=tx, flags=flags_to_insert)
+            writer.insert_many(flags_to_insert)
 
         # Update service statistics
         if port:
             flags_written = sum(1 for loc, _, _ in flags_found if loc == "write")
             flags_retrieved = sum(1 for loc, _, _ in flags_found if loc == "read")
 
-            self.db.service_stats.increment(
-                tx,
-                ServiceStatsRow.Increment(
-                    port=port,
-                    total_tcp_connections=1,
-                    total_tcp_bytes_in=bytes_in,
-                    total_tcp_bytes_out=bytes_out,
-                    total_flags_written=flags_written,
-                    total_flags_retrieved=flags_retrieved,
-                ),
+            stats.add_service(
+                port,
+                total_flags_written=flags_written,
+                total_flags_retrieved=flags_retrieved,
             )
 
             if flags_written or flags_retrieved:
-                self.db.flag_time_stats.increment(
-                    tx,
-                    FlagTimeStatsRow.Increment(
-                        port=port,
-                        time=start_minute_ts,
-                        write_count=flags_written,
-                        read_count=flags_retrieved,
-                    ),
+                stats.add_flag_time(
+                    port,
+                    start_minute_ts,
+                    write_count=flags_written,
+                    read_count=flags_retrieved,
                 )
 
             # Update TCP connection stats
@@ -309,37 +306,19 @@ class TcpTapProcessor:
             write_min = (total_write_bytes // precision) * precision
             write_max = write_min + precision
 
-            self.db.tcp_connection_stats.increment(
-                tx,
-                TcpConnectionStatsRow.Increment(
-                    port=port,
-                    read_min=read_min,
-                    read_max=read_max,
-                    write_min=write_min,
-                    write_max=write_max,
-                    count=1,
-                ),
-            )
+            stats.add_tcp_connection(port, read_min, read_max, write_min, write_max)
 
             # Update time-based TCP connection stats (round to minute)
             time_bucket = (start_time_ts // 60000) * 60000
-
-            self.db.tcp_connection_time_stats.increment(
-                tx,
-                port=port,
-                read_min=read_min,
-                read_max=read_max,
-                write_min=write_min,
-                write_max=write_max,
-                time=time_bucket,
+            stats.add_tcp_connection_time(
+                port, read_min, read_max, write_min, write_max, time_bucket
             )
 
             # Update aggregated TCP stats
-            self.db.tcp_stats.increment(
-                tx,
-                port=port,
+            stats.add_tcp(
+                port,
                 bytes_in=bytes_in,
                 bytes_out=bytes_out,
                 duration_ms=duration_ms,
-                total_flags_found=flags_written + flags_retrieved,
+                flags_found=flags_written + flags_retrieved,
             )
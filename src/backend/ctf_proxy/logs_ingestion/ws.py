@@ -1,4 +1,3 @@
-import base64
 import re
 from collections.abc import Generator, Iterable
 
@@ -62,14 +61,13 @@ class FrameReader:
         return gen()
 
 
-def iter_ws_frames_from_b64(
-    b64: str,
+def iter_ws_frames(
+    data: bytes,
     *,
     is_client: bool,
     extensions_header: str = "",
     max_size: int | None = None,
 ) -> Generator[tuple[bool, Opcode, bytes]]:
-    data = base64.b64decode(b64)
     r = FrameReader(data)
     exts = make_extensions(extensions_header, is_client=is_client)
 
@@ -87,16 +85,16 @@ def iter_ws_frames_from_b64(
 
 
 def parse_ws_frames(
-    b64: str,
+    data: bytes,
     *,
     is_client: bool,
     extensions_header: str = "",
     max_size: int | None = None,
 ) -> list[tuple[bool, Opcode, bytes]]:
     return [
-        (fin, opcode, data)
-        for fin, opcode, data in iter_ws_frames_from_b64(
-            b64,
+        (fin, opcode, payload)
+        for fin, opcode, payload in iter_ws_frames(
+            data,
             is_client=is_client,
             extensions_header=extensions_header,
             max_size=max_size,
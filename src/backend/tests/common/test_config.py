@@ -28,6 +28,60 @@ class TestService:
         assert "port=8080" in repr_str
         assert "ServiceType.HTTP" in repr_str
 
+    def test_ignore_patterns_are_compiled(self):
+        service = Service(
+            name="web",
+            port=8080,
+            type="http",
+            ignore_path_stats=[
+                {"method": "GET", "path": "/static/.*"},
+                {"method": "GET", "path": "/health"},
+                {"method": "POST", "path": "/upload"},
+            ],
+            ignore_query_param_stats={"token": "[a-f0-9]+"},
+            ignore_header_stats={"user-agent": "curl/.*", "x-trace": ".*"},
+        )
+        assert len(service.ignore_path_patterns["GET"]) == 1
+        assert service.is_ignored_path("GET", "/static/app.js")
+        assert service.is_ignored_path("GET", "/health")
+        assert not service.is_ignored_path("GET", "/upload")
+        assert not service.is_ignored_path("GET", "/healthz")
+        assert not service.is_ignored_path("DELETE", "/health")
+        assert service.ignore_query_param_patterns["token"].fullmatch("deadbeef")
+        assert service.ignore_header_patterns["user-agent"].fullmatch("curl/8.0")
+        assert service.ignored_header_names == {"x-trace"}
+        assert "x-trace" not in service.ignore_header_patterns
+        assert service == Service(**service.model_dump())
+
+    def test_ignore_path_rules_keep_their_own_meaning(self):
+        service = Service(
+            name="web",
+            port=8080,
+            type="http",
+            ignore_path_stats=[
+                {"method": "GET", "path": "/a"},
+                {"method": "GET", "path": "(?i)/b"},
+                {"method": "GET", "path": "/(?P<x>c)"},
+                {"method": "GET", "path": "/(?P<x>d)"},
+                {"method": "GET", "path": r"(e)\1"},
+                {"method": "GET", "path": r"(f)\1"},
+            ],
+        )
+        assert service.is_ignored_path("GET", "/a")
+        assert service.is_ignored_path("GET", "/B")
+        assert service.is_ignored_path("GET", "/d")
+        assert service.is_ignored_path("GET", "ee")
+        assert service.is_ignored_path("GET", "ff")
+        assert not service.is_ignored_path("GET", "/A")
+
+        with pytest.raises(ValueError, match="Invalid ignore pattern"):
+            Service(
+                name="web",
+                port=8080,
+                type="http",
+                ignore_path_stats=[{"method": "GET", "path": "a)|(b"}],
+            )
+
     def test_invalid_service_type(self):
         with pytest.raises((ValueError, Exception)):  # Pydantic ValidationError or similar
             Service(name="web", port=8080, type="invalid")
@@ -140,6 +194,39 @@ services:
         finally:
             Path(temp_path).unlink()
 
+    def test_invalid_ignore_patterns_rejected_at_load(self):
+        config_content = """
+services:
+  - name: web
+    port: 8080
+    type: http
+    ignore_header_stats:
+      user-agent: "curl/("
+"""
+        valid, errors = Config.validate_content(config_content)
+        assert not valid
+        assert "Invalid ignore pattern" in errors[0]
+
+        valid, errors = Config.validate_content('flag_format: "FLAG_[A-Z"\n')
+        assert not valid
+        assert "Invalid flag format pattern" in errors[0]
+
+    def test_non_ascii_flag_format_rejected(self):
+        # a bytes pattern would turn [а-я] into a range over UTF-8 bytes
+        valid, errors = Config.validate_content('flag_format: "ФЛАГ_[а-я]+"\n')
+        assert not valid
+        assert "must be ASCII" in errors[0]
+
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".yml", delete=False) as f:
+            f.write('flag_format: "ctf_\\\\w+"\n')
+            temp_path = f.name
+        try:
+            config = Config(temp_path)
+            # \w only covers ASCII on bytes, so the match stops before "é"
+            assert config.flag_pattern.findall("ctf_abé".encode()) == [b"ctf_ab"]
+        finally:
+            Path(temp_path).unlink()
+
     def test_missing_required_fields(self):
         config_content = """
 services:
@@ -233,6 +320,39 @@ services:
         finally:
             Path(temp_path).unlink()
 
+    def test_get_service_by_port_follows_reload(self):
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".yml", delete=False) as f:
+            f.write("services:\n  - name: web\n    port: 8080\n    type: http\n")
+            temp_path = f.name
+
+        try:
+            config = Config(temp_path)
+            assert config.get_service_by_port(8080).name == "web"
+            assert config.get_service_by_port(9000) is None
+
+            Path(temp_path).write_text("services:\n  - name: db\n    port: 9000\n    type: tcp\n")
+            config.load_config()
+            assert config.get_service_by_port(8080) is None
+            assert config.get_service_by_port(9000).name == "db"
+        finally:
+            Path(temp_path).unlink()
+
+    def test_flag_pattern_follows_reload(self):
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".yml", delete=False) as f:
+            f.write('flag_format: "FLAG_[A-Z]{4}"\n')
+            temp_path = f.name
+
+        try:
+            config = Config(temp_path)
+            assert config.flag_pattern.pattern == b"FLAG_[A-Z]{4}"
+            assert config.flag_pattern is config.flag_pattern
+
+            Path(temp_path).write_text('flag_format: "CTF{.*}"\n')
+            config.load_config()
+            assert config.flag_pattern.pattern == b"CTF{.*}"
+        finally:
+            Path(temp_path).unlink()
+
     def test_config_repr(self):
         config_content = """
 services:
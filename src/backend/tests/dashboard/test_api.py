@@ -1,5 +1,6 @@
 import hashlib
 import tempfile
+import time
 from pathlib import Path
 
 import pytest
@@ -96,6 +97,30 @@ def test_get_services(client):
     assert stats["status_counts"]["500"] == 5
 
 
+def test_get_services_recent_deltas(client, temp_db):
+    now = int(time.time() * 1000)
+    with temp_db.connect() as conn:
+        conn.execute(
+            "INSERT INTO http_request_time_stats (port, time, count, blocked_count) VALUES "
+            "(%s, %s, %s, %s), (%s, %s, %s, %s), (%s, %s, %s, %s)",
+            (8002, now, 7, 2, 8002, now - 60_000, 3, 1, 8002, now - 3_600_000, 100, 50),
+        )
+        conn.execute(
+            "INSERT INTO flag_time_stats (port, time, write_count, read_count) VALUES (%s, %s, %s, %s)",
+            (8002, now, 4, 3),
+        )
+
+    response = client.get("/api/services", headers={"Authorization": f"Bearer {TEST_API_TOKEN}"})
+    assert response.status_code == 200
+
+    stats = response.json()["services"][1]["stats"]
+    assert stats["total_requests"] == 50
+    assert stats["requests_delta"] == 10
+    assert stats["blocked_requests_delta"] == 3
+    assert stats["flags_written_delta"] == 4
+    assert stats["flags_retrieved_delta"] == 3
+
+
 def test_get_service_by_port(client):
     response = client.get(
         "/api/services/8001", headers={"Authorization": f"Bearer {TEST_API_TOKEN}"}
@@ -134,3 +159,48 @@ def test_multiple_service_types(client):
     tcp_service = next(s for s in services if s["type"] == "tcp")
     assert tcp_service["name"] == "tcp-service"
     assert tcp_service["port"] == 9001
+
+
+def test_get_request_linked_session_requests(client, temp_db):
+    with temp_db.connect() as conn:
+        ids = [
+            conn.execute(
+                "INSERT INTO http_request (port, start_time, path, method, is_blocked) "
+                "VALUES (8001, %s, %s, 'GET', 0) RETURNING id",
+                (1_700_000_000_000 + i, f"/p{i}?x=1"),
+            ).fetchone()[0]
+            for i in range(3)
+        ]
+        sessions = [
+            conn.execute(
+                "INSERT INTO session (port, key, count) VALUES (8001, %s, 1) RETURNING id", (key,)
+            ).fetchone()[0]
+            for key in ("a", "b")
+        ]
+        conn.execute(
+            "INSERT INTO session_link (session_id, http_request_id) VALUES "
+            "(%s, %s), (%s, %s), (%s, %s), (%s, %s), (%s, %s)",
+            (
+                sessions[0],
+                ids[0],
+                sessions[0],
+                ids[1],
+                sessions[0],
+                ids[2],
+                sessions[1],
+                ids[1],
+                sessions[1],
+                ids[2],
+            ),
+        )
+
+    response = client.get(
+        f"/api/requests/{ids[1]}", headers={"Authorization": f"Bearer {TEST_API_TOKEN}"}
+    )
+    assert response.status_code == 200
+
+    linked = response.json()["request"]["linked_requests"]
+    assert [(r["id"], r["direction"], r["path"]) for r in linked] == [
+        (ids[0], "incoming", "/p0"),
+        (ids[2], "outgoing", "/p2"),
+    ]
@@ -0,0 +1,68 @@
+import pytest
+
+from tests.utils import assert_table
+
+
+def test_connect_without_synchronous_commit(db):
+    with db.connect(synchronous_commit=False) as conn:
+        assert conn.execute("SHOW synchronous_commit").fetchone()[0] == "off"
+    with db.connect() as conn:
+        assert conn.execute("SHOW synchronous_commit").fetchone()[0] == "on"
+
+
+def test_connect_reuses_pooled_connection(db):
+    with db.connect() as conn:
+        pid = conn.info.backend_pid
+        conn.execute("SELECT 1")
+    with db.connect() as conn:
+        assert conn.info.backend_pid == pid
+        assert not conn.info.transaction_status
+
+
+def test_execute_sql_returns_dicts_and_columns(db):
+    result = db.execute_sql("SELECT 1 AS a, 'x' AS b UNION ALL SELECT 2, 'y';")
+
+    assert result.columns == ["a", "b"]
+    assert result.rows == [{"a": 1, "b": "x"}, {"a": 2, "b": "y"}]
+
+
+def test_execute_sql_reports_columns_for_empty_result(db):
+    result = db.execute_sql("SELECT id, port FROM http_request")
+
+    assert result.columns == ["id", "port"]
+    assert result.rows == []
+
+
+def test_execute_sql_does_not_leak_session_settings(db):
+    db.execute_sql("SELECT set_config('search_path', 'public', false)")
+
+    assert db.execute_sql("SELECT current_setting('search_path') AS path").rows == [
+        {"path": "logs,analytics,dashboard,public"}
+    ]
+
+
+def test_execute_sql_times_out(db):
+    with pytest.raises(TimeoutError):
+        db.execute_sql("SELECT pg_sleep(1)", timeout=0.05)
+
+    with db.connect() as conn:
+        assert conn.execute("SHOW statement_timeout").fetchone()[0] == "0"
+
+
+def test_writer_commits_or_rolls_back_as_a_unit(db):
+    with db.writer() as tx:
+        db.flags.insert(tx, value="FLAG_KEPT", location="body")
+
+    with pytest.raises(RuntimeError), db.writer() as tx:
+        db.flags.insert(tx, value="FLAG_DROPPED", location="body")
+        raise RuntimeError("boom")
+
+    assert_table(db, "flag", expect=[{"value": "FLAG_KEPT"}])
+
+
+def test_writer_reuses_its_connection_across_batches(db):
+    with db.writer() as tx:
+        pid = tx.connection.info.backend_pid
+    with db.writer() as tx:
+        assert tx.connection.info.backend_pid == pid
+        assert tx.execute("SHOW synchronous_commit").fetchone()[0] == "off"
@@ -0,0 +1,106 @@
+from ctf_proxy.db.base import RowStatus
+from ctf_proxy.db.tables.http_response_code_stats import HttpResponseCodeStatsRow
+from ctf_proxy.db.tables.service_stats import ServiceStatsRow
+from ctf_proxy.db.tables.tcp_connection_stats import TcpConnectionStatsRow
+from ctf_proxy.db.tables.tcp_event import TcpEventRow
+from tests.utils import assert_table
+
+
+def test_service_stats_get_by_ports(db):
+    with db.connect() as conn:
+        tx = conn.cursor()
+        db.service_stats.increment(tx, ServiceStatsRow.Increment(port=3000, total_requests=2))
+        db.service_stats.increment(tx, ServiceStatsRow.Increment(port=4000, total_flags_written=1))
+        rows = db.service_stats.get_by_ports(tx, [3000, 5000])
+
+    assert len(rows) == 1
+    assert isinstance(rows[0].id, int)
+    assert (rows[0].port, rows[0].total_requests, rows[0].total_flags_written) == (3000, 2, 0)
+
+
+def test_service_stats_increment_accumulates(db):
+    with db.connect() as conn:
+        tx = conn.cursor()
+        db.service_stats.increment(tx, ServiceStatsRow.Increment(port=3000, total_requests=2))
+        db.service_stats.increment(
+            tx, ServiceStatsRow.Increment(port=3000, total_requests=1, total_responses=1)
+        )
+        rows = db.service_stats.get_by_ports(tx, [3000])
+
+    assert (rows[0].total_requests, rows[0].total_responses) == (3, 1)
+
+
+def test_response_code_stats_get_by_ports(db):
+    with db.connect() as conn:
+        tx = conn.cursor()
+        db.http_response_code_stats.increment(
+            tx, HttpResponseCodeStatsRow.Increment(port=3000, status_code=200, count=3)
+        )
+        db.http_response_code_stats.increment(
+            tx, HttpResponseCodeStatsRow.Increment(port=3000, status_code=500, count=1)
+        )
+        rows = db.http_response_code_stats.get_by_ports(tx, [3000])
+
+    assert sorted((r.port, r.status_code, r.count) for r in rows) == [
+        (3000, 200, 3),
+        (3000, 500, 1),
+    ]
+
+
+def test_tcp_connection_stats_increment_reports_status(db):
+    bucket = {"port": 9000, "read_min": 0, "read_max": 100, "write_min": 0, "write_max": 100}
+    with db.connect() as conn:
+        tx = conn.cursor()
+        first = db.tcp_connection_stats.increment(tx, TcpConnectionStatsRow.Increment(**bucket))
+        second = db.tcp_connection_stats.increment(
+            tx, TcpConnectionStatsRow.Increment(**bucket, count=2)
+        )
+
+    assert (first, second) == (RowStatus.NEW, RowStatus.UPDATED)
+    assert_table(db, "tcp_connection_stats", expect=[{"port": 9000, "count": 3}])
+
+
+def test_tcp_event_iter_by_connection_ids_streams_in_order(db):
+    with db.connect() as conn:
+        tx = conn.cursor()
+        first = db.tcp_connections.insert(
+            tx, port=9001, connection_id=1, start_time=0, duration_ms=5, bytes_in=3, bytes_out=0
+        )
+        second = db.tcp_connections.insert(
+            tx, port=9001, connection_id=2, start_time=0, duration_ms=5, bytes_in=0, bytes_out=0
+        )
+        db.tcp_events.insert_many(
+            tx,
+            [
+                TcpEventRow.Insert(
+                    connection_id=first if i % 2 else second,
+                    timestamp=i,
+                    event_type="read",
+                    data_text=str(i),
+                )
+                for i in range(200)
+            ],
+        )
+
+    with db.connect() as conn:
+        rows = list(db.tcp_events.iter_by_connection_ids(conn, [first]))
+
+    assert [row["data_text"] for row in rows] == [str(i) for i in range(1, 200, 2)]
+    assert all(row["connection_id"] == first for row in rows)
+
+
+def test_path_stats_increment_many_shares_path_ids_across_ports(db):
+    with db.connect() as conn:
+        tx = conn.cursor()
+        db.http_path_stats.increment_many(tx, {(3000, "/a"): 2, (3001, "/a"): 1, (3000, "/b"): 5})
+        db.http_path_stats.increment_many(tx, {(3000, "/a"): 3})
+
+    with db.connect() as conn:
+        rows = conn.execute(
+            """SELECT s.port, d.path, s.count FROM http_path_stats s
+               JOIN path_dim d ON d.id = s.path_id ORDER BY s.port, d.path"""
+        ).fetchall()
+        dims = conn.execute("SELECT COUNT(*) FROM path_dim").fetchone()[0]
+
+    assert [tuple(row) for row in rows] == [(3000, "/a", 5), (3000, "/b", 5), (3001, "/a", 1)]
+    assert dims == 2
@@ -0,0 +1,53 @@
+from ctf_proxy.logs_ingestion.access_log import AccessLogReader
+
+
+def test_read_new_entries_tracks_byte_offsets(tmp_path):
+    log = tmp_path / "access.log"
+    log.write_bytes('{"a":1}\n\n{"b":"é"}\nbad\n{"c":3}\n{"partial"'.encode())
+
+    reader = AccessLogReader(str(log))
+    first = reader.read_new_entries(max_entries=2)
+    rest = reader.read_new_entries()
+
+    assert [e.data for e in first + rest] == [{"a": 1}, {"b": "é"}, {"c": 3}]
+    assert [e.end_position for e in first + rest] == [8, 20, 32]
+    assert reader.last_position == 32
+
+
+def test_read_new_entries_resumes_past_allocation_granularity(tmp_path):
+    log = tmp_path / "access.log"
+    padding = b'{"pad":"' + b"x" * 70000 + b'"}\n'
+    log.write_bytes(padding + b'{"n":1}\n{"n":2}\n')
+
+    reader = AccessLogReader(str(log))
+    assert len(reader.read_new_entries(max_entries=2)) == 2
+    with log.open("ab") as f:
+        f.write(b'{"n":3}\n')
+
+    assert [e.data for e in reader.read_new_entries()] == [{"n": 2}, {"n": 3}]
+
+
+def test_position_is_rewritten_in_place_and_reloaded(tmp_path):
+    log = tmp_path / "access.log"
+    log.write_bytes(b"")
+
+    reader = AccessLogReader(str(log))
+    reader.write_last_processed_position(12345)
+    reader.write_last_processed_position(7)
+    reader.flush()
+
+    assert (tmp_path / "access.log.pos").read_text() == "7".zfill(20)
+    assert AccessLogReader(str(log)).last_position == 7
+
+
+def test_unpadded_position_file_is_still_read(tmp_path):
+    log = tmp_path / "access.log"
+    log.write_bytes(b"")
+    (tmp_path / "access.log.pos").write_text("123456")
+
+    reader = AccessLogReader(str(log))
+    assert reader.last_position == 123456
+
+    reader.write_last_processed_position(42)
+    reader.flush()
+    assert AccessLogReader(str(log)).last_position == 42
@@ -0,0 +1,89 @@
+import json
+
+from ctf_proxy.common.config import Config
+from ctf_proxy.dashboard.stats import fetch_raw_request
+from ctf_proxy.logs_ingestion.batch import BatchProcessor
+
+
+def write_request(tmp_path, request_id: str, path: str):
+    tap = {
+        "http_buffered_trace": {
+            "request": {
+                "headers": [
+                    {"key": ":method", "value": "GET"},
+                    {"key": ":path", "value": path},
+                    {"key": "x-request-id", "value": request_id},
+                ]
+            },
+            "response": {"headers": [{"key": ":status", "value": "200"}]},
+        }
+    }
+    (tmp_path / "tap" / f"http__{request_id}.json").write_text(json.dumps(tap))
+    log_entry = {
+        "stream_id": request_id,
+        "start_time": "2025-10-22T08:30:25.315Z",
+        "method": "GET",
+        "path": path,
+        "status": 200,
+        "duration_ms": 1,
+        "upstream_host": "10.0.0.1:8080",
+    }
+    with open(tmp_path / "http_access.log", "a") as f:
+        f.write(json.dumps(log_entry) + "\n")
+    return tap
+
+
+def make_processor(tmp_path) -> BatchProcessor:
+    for folder in ("tap", "tcp-tap", "archive"):
+        (tmp_path / folder).mkdir()
+    (tmp_path / "http_access.log").touch()
+    (tmp_path / "tcp_access.log").touch()
+
+    config = Config("tests/logs_ingestion/data/test-config.yaml")
+    return BatchProcessor(
+        config,
+        http_tap_folder=str(tmp_path / "tap"),
+        http_access_log=str(tmp_path / "http_access.log"),
+        tcp_access_log=str(tmp_path / "tcp_access.log"),
+        tcp_tap_folder=str(tmp_path / "tcp-tap"),
+        archive_folder=str(tmp_path / "archive"),
+    )
+
+
+def test_fetch_raw_request_from_later_batch_in_shared_archive(db, tmp_path):
+    processor = make_processor(tmp_path)
+
+    write_request(tmp_path, "req-1", "/first")
+    assert processor.process_batch() == 1
+    second_tap = write_request(tmp_path, "req-2", "/second")
+    assert processor.process_batch() == 1
+    assert len(list((tmp_path / "tap").iterdir())) == 2
+
+    processor.flush_archive_buffer()
+    processor.finish_pending_archive()
+
+    assert len(list((tmp_path / "archive").iterdir())) == 1
+    assert list((tmp_path / "tap").iterdir()) == []
+    with db.connect() as conn:
+        (request_id,) = conn.execute(
+            "SELECT id FROM http_request WHERE path = %s", ("/second",)
+        ).fetchone()
+
+    raw = fetch_raw_request(request_id, db, archive_folder=str(tmp_path / "archive"))
+    assert raw == second_tap
+
+
+def test_tap_files_kept_when_archive_fails(db, tmp_path):
+    processor = make_processor(tmp_path)
+
+    def fail(batch_id, to_archive):
+        raise OSError("disk full")
+
+    processor.save_archive = fail
+    write_request(tmp_path, "req-1", "/first")
+    assert processor.process_batch() == 1
+
+    processor.flush_archive_buffer()
+    processor.finish_pending_archive()
+
+    assert [p.name for p in (tmp_path / "tap").iterdir()] == ["http__req-1.json"]
@@ -52,6 +52,54 @@ def test_service_stats_sum(db):
     )
 
 
+def test_tcp_stats_average_duration_across_batches(db):
+    first = BatchStats()
+    first.add_tcp(port=9000, bytes_in=10, bytes_out=1, duration_ms=100)
+    first.add_tcp(port=9000, bytes_in=20, bytes_out=2, duration_ms=200, flags_found=1)
+    flush(db, first)
+
+    second = BatchStats()
+    second.add_tcp(port=9000, bytes_in=30, bytes_out=3, duration_ms=600)
+    flush(db, second)
+
+    assert_table(
+        db,
+        "tcp_stats",
+        expect=[
+            {
+                "total_connections": 3,
+                "total_bytes_in": 60,
+                "total_bytes_out": 6,
+                "avg_duration_ms": 300,
+                "total_flags_found": 1,
+            }
+        ],
+    )
+
+
+def test_tcp_connection_buckets_aggregate(db):
+    batch = BatchStats()
+    batch.add_tcp_connection(port=9000, read_min=0, read_max=100, write_min=0, write_max=100)
+    batch.add_tcp_connection(port=9000, read_min=0, read_max=100, write_min=0, write_max=100)
+    batch.add_tcp_connection_time(
+        port=9000, read_min=0, read_max=100, write_min=0, write_max=100, time=60000
+    )
+    flush(db, batch)
+
+    assert_table(db, "tcp_connection_stats", expect=[{"port": 9000, "count": 2}])
+    assert_table(db, "tcp_connection_time_stats", expect=[{"time": 60000, "count": 1}])
+
+
 def test_empty_flush_is_noop(db):
     flush(db, BatchStats())
     assert_table(db, "http_header_time_stats", expect=[])
+
+
+def test_path_stats_aggregate_same_path(db):
+    batch = BatchStats()
+    batch.add_path(port=80, path="/a")
+    batch.add_path(port=80, path="/a")
+    batch.add_path(port=80, path="/b")
+    flush(db, batch)
+
+    assert_table(db, "http_path_stats", expect=[{"count": 2}, {"count": 1}])
@@ -1,15 +1,18 @@
+import base64
 import json
+from urllib.parse import parse_qsl, urlparse
 
 from ctf_proxy.common.config import Config
 from ctf_proxy.db.models import ProxyStatsDB
-from ctf_proxy.db.utils import parse_headers
+from ctf_proxy.db.utils import parse_headers, parse_headers_dict
 from ctf_proxy.logs_ingestion.batch_stats import BatchStats
 from ctf_proxy.logs_ingestion.batch_writer import Batch
 from ctf_proxy.logs_ingestion.http import (
     HttpTapHeaders,
     HttpTapProcessor,
-    PathStatsAggregator,
+    iter_query_params,
     serialize_headers,
+    split_path,
 )
 from tests.utils import assert_table
 
@@ -29,6 +32,16 @@ def test_headers_serialize_parse_roundtrip():
         ("x-dup", "b"),
     ]
     assert parse_headers(None) == []
+    assert parse_headers_dict(serialize_headers(headers)) == {"host": "example.com", "x-dup": "b"}
+    assert parse_headers_dict(None) == {}
+
+
+def test_split_path_and_query_params_match_urllib():
+    for full_path in ["/a/b?x=1&y=%2F+z&&flag&=v#frag", "/plain", "http://host/p?q=1", ""]:
+        parsed = urlparse(full_path)
+        path, query = split_path(full_path)
+        assert (path, query) == (parsed.path, parsed.query)
+        assert list(iter_query_params(query)) == parse_qsl(query, keep_blank_values=True)
 
 
 def process_tap(db: ProxyStatsDB, file_path: str, tap_id="test-id", batch_id="test-batch"):
@@ -44,7 +57,6 @@ def process_tap(db: ProxyStatsDB, file_path: str, tap_id="test-id", batch_id="te
         tx = conn.cursor()
         writer = Batch()
         stats = BatchStats()
-        paths = PathStatsAggregator()
         processor.process_tap(
             tap,
             tap_id=tap_id,
@@ -52,10 +64,8 @@ def process_tap(db: ProxyStatsDB, file_path: str, tap_id="test-id", batch_id="te
             log_entry=log_entry,
             writer=writer,
             stats=stats,
-            paths=paths,
         )
         writer.flush(tx)
-        paths.flush(tx)
         stats.flush(tx)
         conn.commit()
 
@@ -86,3 +96,42 @@ def test_ws_tap_processing(db):
             {"is_client": 0, "payload_text": "\x03"},
         ],
     )
+
+
+def test_tap_headers_share_normalized_names():
+    first = HttpTapHeaders([{"key": "X-Custom-Header", "value": "a"}])
+    second = HttpTapHeaders([{"key": "X-Custom-Header", "value": "b"}])
+
+    (first_name,) = first.values
+    (second_name,) = second.values
+    assert first_name == "x-custom-header"
+    assert first_name is second_name
+    assert second.get("X-CUSTOM-HEADER") == "b"
+
+
+def test_body_flag_offsets_are_byte_offsets(db):
+    body = "é ctf{}".encode()
+    tap = {
+        "http_buffered_trace": {
+            "request": {
+                "headers": [{"key": ":method", "value": "POST"}, {"key": ":path", "value": "/"}],
+                "body": {"as_bytes": base64.b64encode(body).decode()},
+            },
+            "response": {"headers": [{"key": ":status", "value": "200"}]},
+        }
+    }
+    log_entry = {"upstream_host": "127.0.0.1:1234", "start_time": "2025-10-22T08:30:25.315Z"}
+
+    processor = HttpTapProcessor(db=db, config=Config("tests/logs_ingestion/data/test-config.yaml"))
+    with db.connect() as conn:
+        tx = conn.cursor()
+        writer = Batch()
+        processor.process_tap(
+            tap, tap_id="t", batch_id="b", log_entry=log_entry, writer=writer, stats=BatchStats()
+        )
+        writer.flush(tx)
+        rows = tx.execute('SELECT "offset", value FROM flag').fetchall()
+        (request_body,) = tx.execute("SELECT body FROM http_request").fetchone()
+
+    assert [tuple(row) for row in rows] == [(3, "ctf{}")]
+    assert request_body == "é ctf{}"
@@ -0,0 +1,65 @@
+from http.cookies import SimpleCookie
+
+from ctf_proxy.common.config import Config
+from ctf_proxy.logs_ingestion.sessions import (
+    Link,
+    SessionRequests,
+    SessionsStorage,
+    parse_named_cookies,
+)
+
+
+def test_parse_named_cookies_matches_simple_cookie():
+    header = 'theme=dark; session="abc123"; sid=xyz; session=def456'
+    names = frozenset({"session", "sid"})
+    cookie = SimpleCookie()
+    cookie.load(header)
+
+    assert parse_named_cookies(header, names) == {name: cookie[name].value for name in names}
+
+
+def test_sessions_follow_cookie_name_priority():
+    storage = SessionsStorage(Config("tests/logs_ingestion/data/test-config.yaml"))
+
+    in_session = storage.get_in_session({"cookie": ["sid=low; session=high"]}, port=1)
+    out_session = storage.get_out_session(
+        {"set-cookie": ["theme=dark; Path=/", "token=t1; Path=/; HttpOnly"]}, port=1
+    )
+
+    assert in_session == "high"
+    assert out_session == "t1"
+    assert storage.get_in_session({"cookie": ["theme=dark"]}, port=1) is None
+
+
+def test_session_requests_sort_out_of_order_arrivals():
+    requests = SessionRequests()
+    for timestamp, request_id in [(10, 1), (30, 3), (20, 2), (40, 4)]:
+        requests.add_request(timestamp, request_id)
+
+    assert requests.find_request_before(30) == 2
+    assert requests.find_request_after(20) == 3
+    assert requests.requests == [(10, 1), (20, 2), (30, 3), (40, 4)]
+
+
+def test_links_are_scoped_by_port():
+    storage = SessionsStorage(Config("tests/logs_ingestion/data/test-config.yaml"))
+    storage.add_request(1, 1, 100, {"cookie": ["session=a"]}, {})
+    storage.add_request(2, 2, 150, {"cookie": ["session=a"]}, {})
+    storage.add_request(1, 3, 200, {"cookie": ["session=a"]}, {})
+
+    assert storage.get_links(1, 3) == [Link(from_request_id=1, to_request_id=3)]
+    assert storage.get_links(2, 2) == []
+    assert storage.get_links(1, 2) == []
+
+
+def test_prune_drops_sessions_older_than_max_age():
+    storage = SessionsStorage(Config("tests/logs_ingestion/data/test-config.yaml"))
+    storage.add_request(1, 1, 0, {"cookie": ["session=old"]}, {})
+    storage.add_request(1, 2, 10_000, {"cookie": ["session=both"]}, {})
+    storage.add_request(1, 3, 3_700_000, {"cookie": ["session=both"]}, {})
+    storage.prune()
+
+    assert list(storage.request_sessions[1]) == ["both"]
+    assert storage.request_sessions[1]["both"].requests == [(3_700_000, 3)]
+    assert storage.get_links(1, 1) == []
+    assert storage.get_links(1, 3) == []
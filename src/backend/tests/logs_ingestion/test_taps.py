@@ -1,6 +1,8 @@
 import json
+import os
 
 from ctf_proxy.logs_ingestion.http import HttpTapsFolder
+from ctf_proxy.logs_ingestion.tcp import TcpTapsFolder
 
 
 def write_tap(folder, filename: str, request_id: str):
@@ -57,7 +59,7 @@ def test_refresh_skips_already_indexed_files(tmp_path):
     assert loaded == []
 
 
-def test_cleanup_removes_files_and_clears_index(tmp_path):
+def test_popped_files_stay_on_disk_until_removed(tmp_path):
     write_tap(tmp_path, "http__1.json", "req-1")
 
     folder = HttpTapsFolder(str(tmp_path))
@@ -65,5 +67,50 @@ def test_cleanup_removes_files_and_clears_index(tmp_path):
     folder.pop_filename("http__1.json")
     folder.cleanup()
 
+    assert (tmp_path / "http__1.json").exists()
+    assert folder.indexed == {"http__1.json"}
+
+    folder.remove(["http__1.json"])
+
     assert not (tmp_path / "http__1.json").exists()
     assert folder.indexed == set()
+
+
+def test_index_by_id_pattern_skips_json_parse(tmp_path):
+    write_tap(tmp_path, "http__1.json", "req-1")
+    (tmp_path / "tcp_1.json").write_text(json.dumps({"socket_buffered_trace": {"trace_id": "42"}}))
+
+    http_folder = HttpTapsFolder(str(tmp_path))
+    tcp_folder = TcpTapsFolder(str(tmp_path))
+    http_folder.load_file = tcp_folder.load_file = lambda name: None
+    http_folder.try_index_file("http__1.json")
+    tcp_folder.try_index_file("tcp_1.json")
+
+    assert http_folder.request_id_to_file == {"req-1": "http__1.json"}
+    assert tcp_folder.trace_id_to_file == {42: "tcp_1.json"}
+
+
+def test_refresh_falls_back_to_json_for_escaped_ids(tmp_path):
+    write_tap(tmp_path, "http__1.json", "reqé")
+
+    folder = HttpTapsFolder(str(tmp_path))
+    folder.refresh()
+
+    assert folder.request_id_to_file == {"reqé": "http__1.json"}
+
+
+def test_refresh_skips_scan_when_directory_unchanged(tmp_path):
+    write_tap(tmp_path, "http__1.json", "req-1")
+    os.utime(tmp_path, ns=(0, 0))
+
+    folder = HttpTapsFolder(str(tmp_path))
+    folder.refresh()
+
+    write_tap(tmp_path, "http__2.json", "req-2")
+    os.utime(tmp_path, ns=(0, 0))
+    folder.refresh()
+    assert folder.indexed == {"http__1.json"}
+
+    os.utime(tmp_path)
+    folder.refresh()
+    assert folder.indexed == {"http__1.json", "http__2.json"}
@@ -1,6 +1,8 @@
 import base64
 
 from ctf_proxy.common.config import Config
+from ctf_proxy.logs_ingestion.batch_stats import BatchStats
+from ctf_proxy.logs_ingestion.batch_writer import Batch
 from ctf_proxy.logs_ingestion.tcp import TcpTapProcessor
 from tests.utils import assert_table
 
@@ -38,15 +40,68 @@ def test_tcp_events_batch_insert(db):
 
     with db.connect() as conn:
         tx = conn.cursor()
-        processor.process_tap(tx, data, tap_id="t", batch_id="b", log_entry=log_entry)
+        writer = Batch()
+        stats = BatchStats()
+        processor.process_tap(
+            data, tap_id="t", batch_id="b", log_entry=log_entry, writer=writer, stats=stats
+        )
+        writer.flush(tx)
+        stats.flush(tx)
         conn.commit()
+        connection_id = tx.execute("SELECT id FROM tcp_connection").fetchone()[0]
 
     assert_table(
         db,
         "tcp_event",
         expect=[
-            {"event_type": "read", "data_text": "hello", "data_size": 5},
-            {"event_type": "write", "data_text": "world", "data_size": 5},
-            {"event_type": "closed", "data_size": 0},
+            {
+                "connection_id": connection_id,
+                "event_type": "read",
+                "data_text": "hello",
+                "data_size": 5,
+            },
+            {
+                "connection_id": connection_id,
+                "event_type": "write",
+                "data_text": "world",
+                "data_size": 5,
+            },
+            {
+                "connection_id": connection_id,
+                "event_type": "closed",
+                "data_size": 0,
+                "end_stream": 1,
+            },
         ],
     )
+
+
+def test_tcp_flag_offsets_span_events(db):
+    config = Config("tests/logs_ingestion/data/test-config.yaml")
+    processor = TcpTapProcessor(db=db, config=config)
+
+    data = {
+        "socket_buffered_trace": {
+            "events": [
+                data_event("read", b"xxctf{}"),
+                data_event("write", b"ctf{}"),
+                data_event("read", b"ab ctf{}"),
+            ]
+        }
+    }
+    log_entry = {"upstream_host": "127.0.0.1:1234", "start_time": TS, "connection_id": 8}
+
+    with db.connect() as conn:
+        tx = conn.cursor()
+        writer = Batch()
+        processor.process_tap(
+            data, tap_id="t", batch_id="b", log_entry=log_entry, writer=writer, stats=BatchStats()
+        )
+        writer.flush(tx)
+        rows = tx.execute('SELECT location, "offset", value FROM flag ORDER BY id').fetchall()
+
+    assert [tuple(row) for row in rows] == [
+        ("read", 2, "ctf{}"),
+        ("write", 0, "ctf{}"),
+        ("read", 10, "ctf{}"),
+    ]